@@ -0,0 +1,40 @@
+"""Composite indexes for the hot query shapes
+
+Sales and invoices are always read by station and date range, usually with a
+fuel type too (lists, exports, rollup rebuilds, cost basis), and the tenant
+scope looks stations up by organization. Until now only the id columns were
+indexed, so each of those queries scanned the whole table.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns) -- kept in step with the models' Index definitions
+INDEXES = [
+    ("ix_sales_station_date_fuel", "sales", ["station_id", "sale_date", "fuel_type_id"]),
+    ("ix_invoices_station_date_fuel", "invoices", ["station_id", "invoice_date", "fuel_type_id"]),
+    ("ix_stations_organization_id", "stations", ["organization_id"]),
+]
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: databases created by create_all with the current models already have them
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
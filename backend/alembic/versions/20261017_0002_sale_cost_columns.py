@@ -0,0 +1,66 @@
+"""Stored cost price and profit columns on sales
+
+Sales keep their average cost price, profit margin and total profit instead of
+recomputing them from invoice history on every read. Existing sales are
+backfilled from their invoices (offline, with --sql, the backfill is left to
+scripts/recompute_sale_costs.py).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept in step with the Sale model
+COLUMNS = [
+    sa.Column("cost_price", sa.Numeric(10, 4), nullable=True),
+    sa.Column("profit_margin", sa.Numeric(10, 4), nullable=True),
+    sa.Column("total_profit", sa.Numeric(14, 2), nullable=True),
+]
+
+
+def upgrade() -> None:
+    if context.is_offline_mode():
+        # No database to inspect or backfill from: emit the columns unconditionally
+        for column in COLUMNS:
+            op.add_column("sales", column)
+        return
+
+    connection = op.get_bind()
+    # Databases created by create_all with the current models already have them
+    existing = {column["name"] for column in sa.inspect(connection).get_columns("sales")}
+    missing = [column for column in COLUMNS if column.name not in existing]
+    if not missing:
+        return
+
+    for column in missing:
+        op.add_column("sales", column)
+
+    # Backfill in the migration's transaction (the session joins it, so the
+    # recompute's commit doesn't end it)
+    from app.models import Station
+    from app.services.cost_basis import recompute_sale_costs
+
+    db = Session(bind=connection)
+    try:
+        recompute_sale_costs(db, [station_id for station_id, in db.query(Station.id).all()])
+    finally:
+        db.close()
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sales") as batch_op:
+        for column in reversed(COLUMNS):
+            batch_op.drop_column(column.name)
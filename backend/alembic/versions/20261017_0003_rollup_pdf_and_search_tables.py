@@ -0,0 +1,123 @@
+"""Rollup, PDF blob, extraction and invoice search tables
+
+Tables added since the original schema: the daily station/fuel rollup behind
+the dashboard, the content-addressed invoice PDF store and the PDF extraction
+proposals, plus the invoice search index. Existing sales and invoices are
+rolled up (offline, with --sql, the rollup is left to scripts/rebuild_daily_summary.py).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_daily_summary() -> None:
+    op.create_table(
+        "daily_station_fuel_summary",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("station_id", sa.Integer(), sa.ForeignKey("stations.id"), nullable=False),
+        sa.Column("fuel_type_id", sa.Integer(), sa.ForeignKey("fuel_types.id"), nullable=False),
+        sa.Column("summary_date", sa.Date(), nullable=False),
+        sa.Column("quantity_sold", sa.Numeric(14, 2), nullable=False),
+        sa.Column("sales_revenue", sa.Numeric(16, 2), nullable=False),
+        sa.Column("quantity_purchased", sa.Numeric(14, 2), nullable=False),
+        sa.Column("purchase_cost", sa.Numeric(16, 2), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("station_id", "fuel_type_id", "summary_date", name="uq_daily_summary_key"),
+    )
+    op.create_index("ix_daily_station_fuel_summary_id", "daily_station_fuel_summary", ["id"])
+
+
+def _create_pdf_blobs() -> None:
+    op.create_table(
+        "pdf_blobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sha256", sa.String(64), unique=True, nullable=False),
+        sa.Column("file_path", sa.String(500), unique=True, nullable=False),
+        sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_pdf_blobs_id", "pdf_blobs", ["id"])
+
+
+def _create_invoice_extractions() -> None:
+    op.create_table(
+        "invoice_extractions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "invoice_id", sa.Integer(), sa.ForeignKey("invoices.id", ondelete="CASCADE"), unique=True, nullable=False
+        ),
+        sa.Column("pdf_file_path", sa.String(500), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("proposal", sa.JSON(), nullable=True),
+        sa.Column("error", sa.String(500), nullable=True),
+        sa.Column("processing_seconds", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_invoice_extractions_id", "invoice_extractions", ["id"])
+
+
+# (table, create function) -- kept in step with the models
+TABLES = [
+    ("daily_station_fuel_summary", _create_daily_summary),
+    ("pdf_blobs", _create_pdf_blobs),
+    ("invoice_extractions", _create_invoice_extractions),
+]
+
+
+def upgrade() -> None:
+    from app.db.search import install_invoice_search, invoice_search_statements
+    from app.services.daily_summary import rebuild_daily_summary
+
+    if context.is_offline_mode():
+        # No database to inspect or roll up: emit every table and the search index
+        for _, create in TABLES:
+            create()
+        for statement in invoice_search_statements(op.get_context().dialect.name):
+            op.execute(statement)
+        return
+
+    connection = op.get_bind()
+    # Databases created by create_all with the current models already have them
+    existing = set(sa.inspect(connection).get_table_names())
+    for table, create in TABLES:
+        if table not in existing:
+            create()
+
+    install_invoice_search(connection)
+
+    if "daily_station_fuel_summary" not in existing:
+        # The session joins the migration's transaction, so the rebuild's commit doesn't end it
+        db = Session(bind=connection)
+        try:
+            rebuild_daily_summary(db)
+        finally:
+            db.close()
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        # The triggers live on invoices and would fail every later write without the FTS table
+        for trigger in ("invoice_search_ai", "invoice_search_ad", "invoice_search_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS invoice_search")
+    else:
+        op.execute("DROP INDEX IF EXISTS ix_invoices_search_trgm")
+
+    for table, _ in reversed(TABLES):
+        op.drop_table(table)
@@ -1,24 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.models import User, Organization
 from app.schemas import UserCreate, UserLogin, UserResponse, Token
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import (
+    verify_password_async, get_password_hash_async, create_user_access_token, PasswordHashingBusy
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-@router.post("/register", response_model=Token)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user and organization"""
-    # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
+def password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in requests, please try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
 
+def create_account(db: Session, user_data: UserCreate, hashed_password: str):
+    """Create the organization and its first user"""
     # Create organization
     organization = Organization(
         name=user_data.business_name,
@@ -31,7 +33,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     # Create user
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
         full_name=user_data.full_name,
         organization_id=organization.id
     )
@@ -39,8 +41,34 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(user)
 
+    return user, organization
+
+
+@router.post("/register", response_model=Token)
+async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+    """Register a new user and organization"""
+    # Database work runs in the threadpool and bcrypt on the hashing pool,
+    # keeping both off the event loop
+
+    # Check if email already exists
+    existing_user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.email == user_data.email).first()
+    )
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+
+    try:
+        hashed_password = await get_password_hash_async(user_data.password)
+    except PasswordHashingBusy:
+        raise password_pool_busy()
+
+    user, organization = await run_in_threadpool(create_account, db, user_data, hashed_password)
+
     # Generate token
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_user_access_token(user.id, user.organization_id, user.is_admin)
 
     return Token(
         access_token=access_token,
@@ -58,11 +86,18 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     """Login with email and password"""
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.email == credentials.email).first()
+    )
+
+    try:
+        password_ok = user is not None and await verify_password_async(credentials.password, user.hashed_password)
+    except PasswordHashingBusy:
+        raise password_pool_busy()
 
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -75,10 +110,12 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
         )
 
     # Get organization
-    organization = db.query(Organization).filter(Organization.id == user.organization_id).first()
+    organization = await run_in_threadpool(
+        lambda: db.query(Organization).filter(Organization.id == user.organization_id).first()
+    )
 
     # Generate token
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_user_access_token(user.id, user.organization_id, user.is_admin)
 
     return Token(
         access_token=access_token,
@@ -101,14 +138,16 @@ def get_current_user_info(
     current_user: User = Depends(__import__('app.api.deps', fromlist=['get_current_user']).get_current_user)
 ):
     """Get current user info"""
-    organization = db.query(Organization).filter(Organization.id == current_user.organization_id).first()
+    # current_user only carries the token claims, so load the full row
+    user = db.query(User).filter(User.id == current_user.id).first()
+    organization = db.query(Organization).filter(Organization.id == user.organization_id).first()
 
     return UserResponse(
-        id=current_user.id,
-        email=current_user.email,
-        full_name=current_user.full_name,
-        is_active=current_user.is_active,
-        organization_id=current_user.organization_id,
+        id=user.id,
+        email=user.email,
+        full_name=user.full_name,
+        is_active=user.is_active,
+        organization_id=user.organization_id,
         organization_name=organization.name,
-        created_at=current_user.created_at
+        created_at=user.created_at
     )
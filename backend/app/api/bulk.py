@@ -0,0 +1,32 @@
+"""Helpers shared by the bulk ingest and import endpoints"""
+import re
+from typing import Dict, Iterable, List, Optional
+from pydantic import ValidationError
+
+# Cap on per-row problems echoed back, so a bad 100k-line file doesn't produce a huge response
+MAX_REPORTED_ROWS = 1000
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    """Compact one-line summary of a pydantic validation error"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+
+def normalize_header(header: str) -> str:
+    """Lowercase a CSV header and drop spaces and punctuation other than '#'"""
+    return re.sub(r"[^a-z0-9#]", "", header.lower())
+
+
+def match_columns(fieldnames: Optional[List[str]], aliases: Dict[str, Iterable[str]]) -> Dict[str, str]:
+    """Map each field to the first CSV header matching one of its aliases"""
+    headers = {normalize_header(name): name for name in (fieldnames or [])}
+    columns = {}
+    for field, names in aliases.items():
+        for alias in names:
+            header = headers.get(normalize_header(alias))
+            if header is not None:
+                columns[field] = header
+                break
+    return columns
@@ -1,24 +1,45 @@
+import asyncio
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Optional
+from sqlalchemy import Row, func, case, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Literal, Optional
 from datetime import date, timedelta
 from decimal import Decimal
-from app.db.database import get_db
-from app.models import Invoice, Sale, Station, FuelType, User
-from app.schemas import DashboardResponse, KPIData, ChartData, StationSalesData, SalesTrendData, FuelTypeData
+from app.db.database import get_async_db
+from app.db.dates import bucket_start, choose_date_unit, next_bucket, truncate_date
+from app.models import FuelType, User, DailyStationFuelSummary
+from app.schemas import (
+    DashboardResponse, KPIData, ComparisonKPIData, ChartData, StationSalesData, SalesTrendData, FuelTypeData,
+    DashboardCacheMetrics
+)
 from app.api.deps import get_current_user
+from app.services.dashboard_cache import DashboardKey, dashboard_cache
+from app.services.dashboard_periods import ComparisonPeriods, comparison_periods
+from app.services.dimension_cache import get_station_names
+from app.services.tenant_scope import org_station_filter
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+# Zero-fill value, matching the 2-decimal scale of the summed rollup columns
+ZERO = Decimal("0.00")
+
+# Most sales_trend points granularity=auto returns before switching to weeks, then months
+MAX_TREND_POINTS = 120
+
 
 @router.get("", response_model=DashboardResponse)
-def get_dashboard(
+async def get_dashboard(
     station_id: Optional[int] = Query(None),
     days: int = Query(30, ge=7, le=365),
     start_date: Optional[date] = Query(None, description="Custom start date (overrides days)"),
     end_date: Optional[date] = Query(None, description="Custom end date"),
-    db: Session = Depends(get_db),
+    granularity: Literal["day", "week", "month", "auto"] = Query(
+        "day", description="Sales trend bucket; auto picks the finest one within MAX_TREND_POINTS points"
+    ),
+    compare: Optional[Literal["previous", "yoy"]] = Query(
+        None, description="Also return KPIs and the sales trend for the previous period or the same dates last year"
+    ),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get dashboard data with KPIs and charts"""
@@ -32,19 +53,22 @@ def get_dashboard(
         period_start = today - timedelta(days=days)
         period_end = today
 
-    start_of_month = today.replace(day=1)
+    if granularity == "auto":
+        granularity = choose_date_unit(period_start, period_end, MAX_TREND_POINTS)
 
-    # Get station IDs for this organization
-    stations_query = db.query(Station).filter(
-        Station.organization_id == current_user.organization_id
-    )
+    # Get stations for this organization (cached names)
+    stations = await db.run_sync(get_station_names, current_user.organization_id)
+    # A cold name cache checked out a connection for the session; return it to the
+    # pool before build_dashboard takes its own, or concurrent requests can each hold
+    # one while waiting for more and exhaust the pool
+    await db.rollback()
     if station_id:
-        stations_query = stations_query.filter(Station.id == station_id)
-
-    stations = stations_query.all()
-    station_ids = [s.id for s in stations]
+        stations = {station_id: stations[station_id]} if station_id in stations else {}
+        station_filter = DailyStationFuelSummary.station_id == station_id
+    else:
+        station_filter = org_station_filter(DailyStationFuelSummary.station_id, current_user.organization_id)
 
-    if not station_ids:
+    if not stations:
         # Return empty dashboard
         return DashboardResponse(
             kpis=KPIData(
@@ -59,51 +83,217 @@ def get_dashboard(
             charts=ChartData(
                 station_comparison=[],
                 sales_trend=[],
-                fuel_breakdown=[]
+                fuel_breakdown=[],
+                trend_granularity=granularity
             )
         )
 
-    # === KPIs ===
+    key = DashboardKey(current_user.organization_id, station_id, period_start, period_end, granularity, compare, today)
+    return await dashboard_cache.get(
+        key,
+        stations.keys(),
+        lambda: build_dashboard(db, stations, station_filter, period_start, period_end, granularity, compare, today)
+    )
+
+
+@router.get("/cache/metrics", response_model=DashboardCacheMetrics)
+def get_dashboard_cache_metrics(current_user: User = Depends(get_current_user)):
+    """Dashboard cache hits and misses for this server process"""
+    return DashboardCacheMetrics(**dashboard_cache.snapshot())
+
+
+async def fetch_all(db: AsyncSession, statement) -> List[Row]:
+    """Run a query on its own pooled connection, so several can run at once"""
+    async with db.bind.connect() as connection:
+        return (await connection.execute(statement)).all()
+
+
+def sum_where(condition, column):
+    """SUM of column over the rows matching condition (conditional aggregation)"""
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def zero_filled_trend(
+    sales_by_bucket: Dict[date, tuple],
+    start: date,
+    end: date,
+    granularity: str
+) -> List[SalesTrendData]:
+    """Trend points for each bucket from start to end"""
+    trend = []
+    current_bucket = bucket_start(start, granularity)
+    while current_bucket <= end:
+        bucket_sales, bucket_quantity = sales_by_bucket.get(current_bucket, (ZERO, ZERO))
+        trend.append(SalesTrendData(
+            date=max(current_bucket, start),
+            total_sales=bucket_sales,
+            total_quantity=bucket_quantity
+        ))
+        current_bucket = next_bucket(current_bucket, granularity)
+    return trend
+
+
+async def build_dashboard(
+    db: AsyncSession,
+    stations: Dict[int, str],
+    station_filter,
+    period_start: date,
+    period_end: date,
+    granularity: str,
+    compare: Optional[str],
+    today: date
+) -> DashboardResponse:
+    """Compute KPIs and charts for the given stations from the daily rollup"""
+    start_of_month = today.replace(day=1)
+    summary_date = DailyStationFuelSummary.summary_date
+    is_today = summary_date == today
+    in_month = summary_date >= start_of_month
+    in_period = summary_date.between(period_start, period_end)
+    month_scope = in_month
+    period_scope = in_period
+
+    # With a comparison, each query scans the union of the current and compared
+    # dates once, and conditional sums split the rows between the two
+    compared: Optional[ComparisonPeriods] = None
+    if compare:
+        compared = comparison_periods(compare, today, period_start, period_end)
+        is_compared_today = summary_date == compared.today
+        in_compared_month = summary_date.between(compared.month_start, compared.month_end)
+        in_compared_period = summary_date.between(compared.period_start, compared.period_end)
+        month_scope = or_(in_month, in_compared_month, is_compared_today)
+        period_scope = or_(in_period, in_compared_period)
+
+    # === Grouped aggregates ===
+    # A fixed number of GROUP BY queries over the daily rollup, so cost grows with
+    # days x stations rather than with the number of sales and invoices. They are
+    # independent, so they run concurrently and the slowest one sets the latency.
+
+    # Sales this month by station and fuel type (today's sales via conditional sum)
+    month_sales_columns = [
+        sum_where(in_month, DailyStationFuelSummary.sales_revenue),
+        sum_where(in_month, DailyStationFuelSummary.quantity_sold),
+        sum_where(is_today, DailyStationFuelSummary.sales_revenue)
+    ]
+    if compared:
+        month_sales_columns += [
+            sum_where(in_compared_month, DailyStationFuelSummary.sales_revenue),
+            sum_where(in_compared_month, DailyStationFuelSummary.quantity_sold),
+            sum_where(is_compared_today, DailyStationFuelSummary.sales_revenue)
+        ]
+    month_sales_query = select(
+        DailyStationFuelSummary.station_id,
+        DailyStationFuelSummary.fuel_type_id,
+        *month_sales_columns
+    ).where(
+        station_filter,
+        month_scope
+    ).group_by(DailyStationFuelSummary.station_id, DailyStationFuelSummary.fuel_type_id)
 
-    # Total sales today
-    sales_today = db.query(func.coalesce(func.sum(Sale.total_sales), 0)).filter(
-        Sale.station_id.in_(station_ids),
-        Sale.sale_date == today
-    ).scalar()
-
-    # Total sales this month
-    sales_this_month = db.query(func.coalesce(func.sum(Sale.total_sales), 0)).filter(
-        Sale.station_id.in_(station_ids),
-        Sale.sale_date >= start_of_month
-    ).scalar()
-
-    # Total fuel purchased this month (liters)
-    fuel_purchased_month = db.query(func.coalesce(func.sum(Invoice.quantity), 0)).filter(
-        Invoice.station_id.in_(station_ids),
-        Invoice.invoice_date >= start_of_month
-    ).scalar()
-
-    # Total fuel sold this month (liters)
-    fuel_sold_month = db.query(func.coalesce(func.sum(Sale.quantity_sold), 0)).filter(
-        Sale.station_id.in_(station_ids),
-        Sale.sale_date >= start_of_month
-    ).scalar()
-
-    # Total purchase cost this month
-    purchase_cost_month = db.query(func.coalesce(func.sum(Invoice.total_amount), 0)).filter(
-        Invoice.station_id.in_(station_ids),
-        Invoice.invoice_date >= start_of_month
-    ).scalar()
+    # Fuel purchased this month by fuel type
+    month_purchases_columns = [
+        sum_where(in_month, DailyStationFuelSummary.quantity_purchased),
+        sum_where(in_month, DailyStationFuelSummary.purchase_cost)
+    ]
+    if compared:
+        month_purchases_columns += [
+            sum_where(in_compared_month, DailyStationFuelSummary.quantity_purchased),
+            sum_where(in_compared_month, DailyStationFuelSummary.purchase_cost)
+        ]
+    month_purchases_query = select(
+        DailyStationFuelSummary.fuel_type_id,
+        *month_purchases_columns
+    ).where(
+        station_filter,
+        month_scope
+    ).group_by(DailyStationFuelSummary.fuel_type_id)
+
+    # Sales for the trend period per day, week or month (truncated in SQL)
+    trend_bucket = truncate_date(db.bind.dialect.name, summary_date, granularity)
+    trend_sales_columns = [
+        sum_where(in_period, DailyStationFuelSummary.sales_revenue),
+        sum_where(in_period, DailyStationFuelSummary.quantity_sold)
+    ]
+    if compared:
+        trend_sales_columns += [
+            sum_where(in_compared_period, DailyStationFuelSummary.sales_revenue),
+            sum_where(in_compared_period, DailyStationFuelSummary.quantity_sold)
+        ]
+    trend_sales_query = select(
+        trend_bucket,
+        *trend_sales_columns
+    ).where(
+        station_filter,
+        period_scope
+    ).group_by(trend_bucket)
+
+    fuel_types_query = select(FuelType.id, FuelType.name).where(FuelType.is_active == True)
+
+    month_sales_rows, month_purchase_rows, trend_sales_rows, fuel_types = await asyncio.gather(
+        fetch_all(db, month_sales_query),
+        fetch_all(db, month_purchases_query),
+        fetch_all(db, trend_sales_query),
+        fetch_all(db, fuel_types_query)
+    )
+
+    sales_today = ZERO
+    sales_this_month = ZERO
+    fuel_sold_month = ZERO
+    sales_by_station = {}
+    sold_by_fuel_type = {}
+    compared_sales_today = ZERO
+    compared_sales_month = ZERO
+    compared_sold_month = ZERO
+    for row_station_id, row_fuel_type_id, row_sales, row_sold, row_today, *row_compared in month_sales_rows:
+        if row_compared:
+            compared_sales, compared_sold, compared_today = row_compared
+            compared_sales_month += Decimal(str(compared_sales))
+            compared_sold_month += Decimal(str(compared_sold))
+            compared_sales_today += Decimal(str(compared_today))
+
+        row_sales = Decimal(str(row_sales))
+        row_sold = Decimal(str(row_sold))
+        sales_today += Decimal(str(row_today))
+        sales_this_month += row_sales
+        fuel_sold_month += row_sold
+
+        station_sales, station_quantity = sales_by_station.get(row_station_id, (ZERO, ZERO))
+        sales_by_station[row_station_id] = (station_sales + row_sales, station_quantity + row_sold)
+        sold_by_fuel_type[row_fuel_type_id] = sold_by_fuel_type.get(row_fuel_type_id, ZERO) + row_sold
+
+    fuel_purchased_month = ZERO
+    purchase_cost_month = ZERO
+    purchased_by_fuel_type = {}
+    compared_purchased_month = ZERO
+    compared_cost_month = ZERO
+    for row_fuel_type_id, row_purchased, row_cost, *row_compared in month_purchase_rows:
+        if row_compared:
+            compared_purchased, compared_cost = row_compared
+            compared_purchased_month += Decimal(str(compared_purchased))
+            compared_cost_month += Decimal(str(compared_cost))
+
+        row_purchased = Decimal(str(row_purchased))
+        fuel_purchased_month += row_purchased
+        purchase_cost_month += Decimal(str(row_cost))
+        purchased_by_fuel_type[row_fuel_type_id] = row_purchased
+
+    sales_by_bucket = {}
+    compared_sales_by_bucket = {}
+    for row_bucket, row_sales, row_quantity, *row_compared in trend_sales_rows:
+        sales_by_bucket[row_bucket] = (Decimal(str(row_sales)), Decimal(str(row_quantity)))
+        if row_compared:
+            compared_sales_by_bucket[row_bucket] = tuple(Decimal(str(value)) for value in row_compared)
+
+    # === KPIs ===
 
     # Profit this month (sales - purchase cost)
-    profit_month = Decimal(str(sales_this_month)) - Decimal(str(purchase_cost_month))
+    profit_month = sales_this_month - purchase_cost_month
 
     kpis = KPIData(
-        total_sales_today=Decimal(str(sales_today)),
-        total_sales_this_month=Decimal(str(sales_this_month)),
-        total_fuel_purchased_this_month=Decimal(str(fuel_purchased_month)),
-        total_fuel_sold_this_month=Decimal(str(fuel_sold_month)),
-        total_purchase_cost_this_month=Decimal(str(purchase_cost_month)),
+        total_sales_today=sales_today,
+        total_sales_this_month=sales_this_month,
+        total_fuel_purchased_this_month=fuel_purchased_month,
+        total_fuel_sold_this_month=fuel_sold_month,
+        total_purchase_cost_this_month=purchase_cost_month,
         profit_this_month=profit_month,
         station_count=len(stations)
     )
@@ -112,69 +302,60 @@ def get_dashboard(
 
     # Station comparison (total sales per station this month)
     station_comparison = []
-    for station in stations:
-        station_sales = db.query(
-            func.coalesce(func.sum(Sale.total_sales), 0),
-            func.coalesce(func.sum(Sale.quantity_sold), 0)
-        ).filter(
-            Sale.station_id == station.id,
-            Sale.sale_date >= start_of_month
-        ).first()
-
+    for row_station_id, station_name in stations.items():
+        station_sales, station_quantity = sales_by_station.get(row_station_id, (ZERO, ZERO))
         station_comparison.append(StationSalesData(
-            station_id=station.id,
-            station_name=station.name,
-            total_sales=Decimal(str(station_sales[0])),
-            total_quantity=Decimal(str(station_sales[1]))
+            station_id=row_station_id,
+            station_name=station_name,
+            total_sales=station_sales,
+            total_quantity=station_quantity
         ))
 
-    # Sales trend (daily sales for the period)
-    sales_trend = []
-    current_date = period_start
-    while current_date <= period_end:
-        day_sales = db.query(
-            func.coalesce(func.sum(Sale.total_sales), 0),
-            func.coalesce(func.sum(Sale.quantity_sold), 0)
-        ).filter(
-            Sale.station_id.in_(station_ids),
-            Sale.sale_date == current_date
-        ).first()
-
-        sales_trend.append(SalesTrendData(
-            date=current_date,
-            total_sales=Decimal(str(day_sales[0])),
-            total_quantity=Decimal(str(day_sales[1]))
-        ))
-        current_date += timedelta(days=1)
+    # Sales trend (sales per bucket for the period, zero-filled)
+    sales_trend = zero_filled_trend(sales_by_bucket, period_start, period_end, granularity)
 
     # Fuel breakdown (purchased vs sold by fuel type)
-    fuel_types = db.query(FuelType).filter(FuelType.is_active == True).all()
-    fuel_breakdown = []
-
-    for ft in fuel_types:
-        purchased = db.query(func.coalesce(func.sum(Invoice.quantity), 0)).filter(
-            Invoice.station_id.in_(station_ids),
-            Invoice.fuel_type_id == ft.id,
-            Invoice.invoice_date >= start_of_month
-        ).scalar()
-
-        sold = db.query(func.coalesce(func.sum(Sale.quantity_sold), 0)).filter(
-            Sale.station_id.in_(station_ids),
-            Sale.fuel_type_id == ft.id,
-            Sale.sale_date >= start_of_month
-        ).scalar()
-
-        fuel_breakdown.append(FuelTypeData(
-            fuel_type_id=ft.id,
-            fuel_type_name=ft.name,
-            quantity_purchased=Decimal(str(purchased)),
-            quantity_sold=Decimal(str(sold))
-        ))
+    fuel_breakdown = [
+        FuelTypeData(
+            fuel_type_id=fuel_type_id,
+            fuel_type_name=fuel_type_name,
+            quantity_purchased=purchased_by_fuel_type.get(fuel_type_id, ZERO),
+            quantity_sold=sold_by_fuel_type.get(fuel_type_id, ZERO)
+        )
+        for fuel_type_id, fuel_type_name in fuel_types
+    ]
 
     charts = ChartData(
         station_comparison=station_comparison,
         sales_trend=sales_trend,
-        fuel_breakdown=fuel_breakdown
+        fuel_breakdown=fuel_breakdown,
+        trend_granularity=granularity
+    )
+
+    if not compared:
+        return DashboardResponse(kpis=kpis, charts=charts)
+
+    # === Comparison ===
+
+    comparison = ComparisonKPIData(
+        compare=compare,
+        today=compared.today,
+        month_start=compared.month_start,
+        month_end=compared.month_end,
+        period_start=compared.period_start,
+        period_end=compared.period_end,
+        total_sales_today=compared_sales_today,
+        total_sales_this_month=compared_sales_month,
+        total_fuel_purchased_this_month=compared_purchased_month,
+        total_fuel_sold_this_month=compared_sold_month,
+        total_purchase_cost_this_month=compared_cost_month,
+        profit_this_month=compared_sales_month - compared_cost_month
+    )
+
+    # Overlay for the trend: the compared period in the same buckets. It can touch one
+    # week or month more or fewer than the current period, so points are overlaid by position.
+    charts.comparison_trend = zero_filled_trend(
+        compared_sales_by_bucket, compared.period_start, compared.period_end, granularity
     )
 
-    return DashboardResponse(kpis=kpis, charts=charts)
+    return DashboardResponse(kpis=kpis, charts=charts, comparison=comparison)
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.core.security import decode_access_token
 from app.models import User
+from app.services.user_status import get_user_status
 
 security = HTTPBearer()
 
@@ -30,6 +31,31 @@ def get_current_user(
             detail="Invalid token payload",
         )
 
+    # Tokens carry the organization claim, so only the account status and role
+    # are needed; they come from a short-lived cache rather than a query per request
+    organization_id = payload.get("org")
+    if organization_id is not None:
+        user_status = get_user_status(db, int(user_id))
+        if user_status is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
+        if not user_status.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User account is disabled",
+            )
+
+        # Detached User built from the claims; query the row for other columns
+        return User(
+            id=int(user_id),
+            organization_id=int(organization_id),
+            is_admin=user_status.is_admin,  # Current role, not the one at sign-in
+            is_active=True
+        )
+
+    # Tokens issued without claims fall back to loading the user
     user = db.query(User).filter(User.id == int(user_id)).first()
     if user is None:
         raise HTTPException(
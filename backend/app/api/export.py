@@ -0,0 +1,120 @@
+"""Streaming export helpers shared by the sales and invoice export endpoints"""
+import csv
+import io
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Query, Session
+from app.db.database import SessionLocal
+
+EXPORT_BATCH_SIZE = 1000
+PARQUET_ROW_GROUP_SIZE = 65536
+
+# Parquet column spec: (name, "date" | "string" | ("decimal", precision, scale))
+ParquetColumns = List[Tuple[str, object]]
+
+
+def iter_query_rows(build_query: Callable[[Session], Query]) -> Iterator:
+    """
+    Yield rows from a dedicated session, fetched EXPORT_BATCH_SIZE at a time.
+    The session lives as long as the response body, not the request dependencies.
+    """
+    db = SessionLocal()
+    try:
+        yield from build_query(db).yield_per(EXPORT_BATCH_SIZE)
+    finally:
+        db.close()
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """Yield CSV text in chunks of EXPORT_BATCH_SIZE rows, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return chunk
+
+    writer.writerow(header)
+    yield flush()
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield flush()
+
+    yield flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object collecting bytes until drained"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def parquet_schema(columns: ParquetColumns):
+    """Build the pyarrow schema, failing the request if pyarrow is not installed"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires pyarrow"
+        )
+
+    def arrow_type(spec):
+        if spec == "date":
+            return pa.date32()
+        if spec == "string":
+            return pa.string()
+        _, precision, scale = spec
+        return pa.decimal128(precision, scale)
+
+    return pa.schema([(name, arrow_type(spec)) for name, spec in columns])
+
+
+def iter_parquet(schema, rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """
+    Yield a Parquet file in pieces, one row group of PARQUET_ROW_GROUP_SIZE rows at a time.
+    Decimal columns keep their exact values.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="snappy")
+
+    def write_row_group(batch):
+        columns = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+        writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+
+    try:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == PARQUET_ROW_GROUP_SIZE:
+                write_row_group(batch)
+                batch = []
+                yield sink.drain()
+
+        if batch:
+            write_row_group(batch)
+    finally:
+        writer.close()
+
+    yield sink.drain()
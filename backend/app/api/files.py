@@ -0,0 +1,175 @@
+"""
+File downloads with validators and byte ranges.
+
+Starlette's FileResponse (0.35) always sends the whole file and never answers
+304, so PDF views re-download everything. file_response() adds:
+- ETag / Last-Modified, with If-None-Match / If-Modified-Since -> 304
+- single "bytes=" Range requests -> 206 (If-Range aware), 416 if unsatisfiable
+- zero-copy sendfile when the server offers the ASGI zerocopysend extension,
+  otherwise chunked reads with aiofiles
+"""
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+import aiofiles
+from fastapi import HTTPException, Request, status
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+class UnsatisfiableRange(Exception):
+    pass
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single "bytes=" range, or None to serve the whole
+    file (other units, multiple ranges, malformed headers). Raises UnsatisfiableRange.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if not start_text:
+            # Suffix range: the last N bytes
+            suffix = int(end_text)
+            if suffix <= 0 or size == 0:
+                raise UnsatisfiableRange()
+            return max(size - suffix, 0), size - 1
+
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise UnsatisfiableRange()
+    return start, min(end, size - 1)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match uses"""
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class FileRangeResponse(Response):
+    """Sends `length` bytes of a file starting at `offset`"""
+
+    def __init__(
+        self,
+        path: str,
+        offset: int,
+        length: int,
+        status_code: int,
+        headers: Dict[str, str],
+        media_type: str,
+        background: Optional[BackgroundTask] = None
+    ):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = background
+        self.init_headers({**headers, "content-length": str(length)})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.fileno(),
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False
+                })
+        else:
+            async with aiofiles.open(self.path, "rb") as file:
+                await file.seek(self.offset)
+                remaining = self.length
+                while remaining > 0:
+                    chunk = await file.read(min(FILE_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break  # File shrank underneath us
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining > 0:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        if self.background is not None:
+            await self.background()
+
+
+def file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    etag: Optional[str] = None,
+    filename: Optional[str] = None
+) -> Response:
+    """Serve a file honoring conditional and Range request headers"""
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+
+    size = stat_result.st_size
+    etag = etag or f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "accept-ranges": "bytes",
+        # Tenant data: browsers may keep it but must revalidate before reuse
+        "cache-control": "private, no-cache",
+    }
+    if filename:
+        safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", filename)
+        headers["content-disposition"] = f'inline; filename="{safe_name}"'
+
+    if not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range holding a stale validator means "send the whole new file"
+    if range_header and (if_range is None or if_range.strip() in (etag, headers["last-modified"])):
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except UnsatisfiableRange:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "content-range": f"bytes */{size}"}
+            )
+
+    if byte_range is None:
+        return FileRangeResponse(path, 0, size, status.HTTP_200_OK, headers, media_type)
+
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{size}"
+    return FileRangeResponse(path, start, end - start + 1, status.HTTP_206_PARTIAL_CONTENT, headers, media_type)
@@ -1,39 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
-from datetime import date
-import os
-import uuid
+from sqlalchemy import func, insert
+from pydantic import ValidationError
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import date, datetime
 import csv
 import io
+from app.core.config import settings
 from app.db.database import get_db
-from app.models import Invoice, Station, FuelType, User
-from app.schemas import InvoiceCreate, InvoiceUpdate, InvoiceResponse
+from app.db.search import invoice_search_filter
+from app.models import Invoice, InvoiceExtraction, Station, FuelType, User
+from app.schemas import (
+    InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoicePage,
+    BulkRowError, DuplicateInvoice, InvoiceImportResult,
+    InvoiceExtractionResponse, ExtractionProposal, ExtractionMetrics
+)
 from app.api.deps import get_current_user
+from app.api.pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.api.export import iter_query_rows, iter_csv, iter_parquet, parquet_schema
+from app.api.uploads import ReceivedUpload, receive_upload, remove_file
+from app.api.files import file_response
+from app.api.bulk import format_validation_error, match_columns, MAX_REPORTED_ROWS
+from app.services.tenant_scope import org_station_filter, owns_station
+from app.services.dimension_cache import DimensionNames, get_dimension_names, get_station_names, get_fuel_type_names
+from app.services.daily_summary import apply_invoice, apply_invoices_bulk
+from app.services.cost_basis import recompute_sale_costs_job
+from app.services.pdf_store import (
+    UPLOAD_DIR, add_pdf_reference, retain_pdf_reference, release_pdf_reference, collect_pdf_file, pdf_etag
+)
+from app.services.pdf_extraction import (
+    queue_extraction, submit_extraction, metrics as extraction_metrics, STATUS_COMPLETED, STATUS_CONFIRMED
+)
 
 router = APIRouter(prefix="/invoices", tags=["Invoices"])
 
-# Upload directory for PDFs
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads", "invoices")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-
-def get_invoice_response(invoice: Invoice, db: Session) -> InvoiceResponse:
+# Supplier statement import: rows inserted per transaction, and accepted header names
+IMPORT_BATCH_SIZE = 1000
+IMPORT_COLUMN_ALIASES = {
+    "invoice_number": ("Invoice #", "Invoice Number", "Invoice No", "Invoice"),
+    "invoice_date": ("Invoice Date", "Date"),
+    "supplier_name": ("Supplier", "Supplier Name"),
+    "station_id": ("Station ID",),
+    "station": ("Station", "Station Name", "Ship To"),
+    "fuel_type_id": ("Fuel Type ID",),
+    "fuel_type": ("Fuel Type", "Product", "Fuel"),
+    "quantity": ("Quantity", "Quantity (gal)", "Net Gallons", "Gallons"),
+    "price_per_unit": ("Price Per Unit", "Price/Gallon ($)", "Price/Gallon", "Unit Price", "Price"),
+    "terminal": ("Terminal",),
+    "carrier": ("Carrier",),
+    "notes": ("Notes",),
+}
+
+
+def get_invoice_response(invoice: Invoice, names: DimensionNames) -> InvoiceResponse:
     """Helper to build invoice response with related names"""
-    station = db.query(Station).filter(Station.id == invoice.station_id).first()
-    fuel_type = db.query(FuelType).filter(FuelType.id == invoice.fuel_type_id).first()
-
     return InvoiceResponse(
         id=invoice.id,
         invoice_number=invoice.invoice_number,
         invoice_date=invoice.invoice_date,
         supplier_name=invoice.supplier_name,
         station_id=invoice.station_id,
-        station_name=station.name if station else "Unknown",
+        station_name=names.station_name(invoice.station_id),
         fuel_type_id=invoice.fuel_type_id,
-        fuel_type_name=fuel_type.name if fuel_type else "Unknown",
+        fuel_type_name=names.fuel_type_name(invoice.fuel_type_id),
         quantity=invoice.quantity,
         price_per_unit=invoice.price_per_unit,
         total_amount=invoice.total_amount,
@@ -43,24 +75,21 @@ def get_invoice_response(invoice: Invoice, db: Session) -> InvoiceResponse:
     )
 
 
-@router.get("", response_model=List[InvoiceResponse])
+@router.get("", response_model=InvoicePage)
 def get_invoices(
     station_id: Optional[int] = Query(None),
     fuel_type_id: Optional[int] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    search: Optional[str] = Query(None, description="Search by invoice number or supplier name"),
+    search: Optional[str] = Query(None, description="Search by invoice number, supplier, terminal or carrier"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(False, description="Also count all matching rows"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all invoices for the current user's organization with optional filters"""
-    # Get station IDs for this organization
-    org_stations = db.query(Station.id).filter(
-        Station.organization_id == current_user.organization_id
-    ).all()
-    org_station_ids = [s.id for s in org_stations]
-
-    query = db.query(Invoice).filter(Invoice.station_id.in_(org_station_ids))
+    """Get a page of invoices for the current user's organization with optional filters"""
+    query = db.query(Invoice).filter(org_station_filter(Invoice.station_id, current_user.organization_id))
 
     if station_id:
         query = query.filter(Invoice.station_id == station_id)
@@ -71,17 +100,76 @@ def get_invoices(
     if end_date:
         query = query.filter(Invoice.invoice_date <= end_date)
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Invoice.invoice_number.ilike(search_term),
-                Invoice.supplier_name.ilike(search_term)
-            )
-        )
+        query = query.filter(invoice_search_filter(db.bind.dialect.name, search))
 
-    invoices = query.order_by(Invoice.invoice_date.desc()).all()
+    total_count = query.count() if include_total else None
+    invoices, next_cursor = paginate(query, Invoice.invoice_date, Invoice.id, cursor, limit)
+    names = get_dimension_names(db, current_user.organization_id)
+
+    return InvoicePage(
+        items=[get_invoice_response(inv, names) for inv in invoices],
+        next_cursor=next_cursor,
+        total_count=total_count
+    )
 
-    return [get_invoice_response(inv, db) for inv in invoices]
+
+INVOICES_CSV_HEADER = [
+    "Date", "Invoice #", "Station", "Supplier", "Fuel Type",
+    "Quantity (gal)", "Price/Gallon ($)", "Total ($)", "Notes"
+]
+
+INVOICES_PARQUET_COLUMNS = [
+    ("invoice_date", "date"),
+    ("invoice_number", "string"),
+    ("station", "string"),
+    ("supplier_name", "string"),
+    ("fuel_type", "string"),
+    ("quantity", ("decimal", 12, 2)),
+    ("price_per_unit", ("decimal", 10, 4)),
+    ("total_amount", ("decimal", 14, 2)),
+    ("notes", "string"),
+]
+
+
+def get_export_rows(
+    current_user: User,
+    station_id: Optional[int],
+    fuel_type_id: Optional[int],
+    start_date: Optional[date],
+    end_date: Optional[date]
+):
+    """Iterate filtered invoices for export as (date, number, station, ...) tuples, in batches"""
+    # Organization scope comes from the station join
+    filters = [Station.organization_id == current_user.organization_id]
+
+    if station_id:
+        filters.append(Invoice.station_id == station_id)
+    if fuel_type_id:
+        filters.append(Invoice.fuel_type_id == fuel_type_id)
+    if start_date:
+        filters.append(Invoice.invoice_date >= start_date)
+    if end_date:
+        filters.append(Invoice.invoice_date <= end_date)
+
+    def build_query(export_db: Session):
+        # Names come from the join, rows are fetched in batches
+        return export_db.query(
+            Invoice.invoice_date,
+            Invoice.invoice_number,
+            func.coalesce(Station.name, "Unknown"),
+            Invoice.supplier_name,
+            func.coalesce(FuelType.name, "Unknown"),
+            Invoice.quantity,
+            Invoice.price_per_unit,
+            Invoice.total_amount,
+            Invoice.notes
+        ).join(
+            Station, Station.id == Invoice.station_id
+        ).outerjoin(
+            FuelType, FuelType.id == Invoice.fuel_type_id
+        ).filter(*filters).order_by(Invoice.invoice_date.desc(), Invoice.id.desc())
+
+    return iter_query_rows(build_query)
 
 
 @router.get("/export/csv")
@@ -90,64 +178,59 @@ def export_invoices_csv(
     fuel_type_id: Optional[int] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Export invoices to CSV"""
-    # Get station IDs for this organization
-    org_stations = db.query(Station.id).filter(
-        Station.organization_id == current_user.organization_id
-    ).all()
-    org_station_ids = [s.id for s in org_stations]
+    """Export invoices to CSV, streamed in chunks"""
+    export_rows = get_export_rows(current_user, station_id, fuel_type_id, start_date, end_date)
+
+    rows = (
+        [
+            invoice_date.strftime("%Y-%m-%d"),
+            invoice_number or "",
+            station_name,
+            supplier_name,
+            fuel_type_name,
+            float(quantity),
+            float(price_per_unit),
+            float(total_amount),
+            notes or ""
+        ]
+        for (invoice_date, invoice_number, station_name, supplier_name, fuel_type_name,
+             quantity, price_per_unit, total_amount, notes) in export_rows
+    )
 
-    query = db.query(Invoice).filter(Invoice.station_id.in_(org_station_ids))
+    return StreamingResponse(
+        iter_csv(INVOICES_CSV_HEADER, rows),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=invoices.csv"}
+    )
 
-    if station_id:
-        query = query.filter(Invoice.station_id == station_id)
-    if fuel_type_id:
-        query = query.filter(Invoice.fuel_type_id == fuel_type_id)
-    if start_date:
-        query = query.filter(Invoice.invoice_date >= start_date)
-    if end_date:
-        query = query.filter(Invoice.invoice_date <= end_date)
 
-    invoices = query.order_by(Invoice.invoice_date.desc()).all()
-
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Header row
-    writer.writerow([
-        "Date", "Invoice #", "Station", "Supplier", "Fuel Type",
-        "Quantity (gal)", "Price/Gallon ($)", "Total ($)", "Notes"
-    ])
-
-    # Data rows
-    for inv in invoices:
-        station = db.query(Station).filter(Station.id == inv.station_id).first()
-        fuel_type = db.query(FuelType).filter(FuelType.id == inv.fuel_type_id).first()
-        writer.writerow([
-            inv.invoice_date.strftime("%Y-%m-%d"),
-            inv.invoice_number or "",
-            station.name if station else "Unknown",
-            inv.supplier_name,
-            fuel_type.name if fuel_type else "Unknown",
-            float(inv.quantity),
-            float(inv.price_per_unit),
-            float(inv.total_amount),
-            inv.notes or ""
-        ])
-
-    output.seek(0)
+@router.get("/export/parquet")
+def export_invoices_parquet(
+    station_id: Optional[int] = Query(None),
+    fuel_type_id: Optional[int] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: User = Depends(get_current_user)
+):
+    """Export invoices to Parquet with exact decimal columns, streamed by row group"""
+    schema = parquet_schema(INVOICES_PARQUET_COLUMNS)
+    export_rows = get_export_rows(current_user, station_id, fuel_type_id, start_date, end_date)
 
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=invoices.csv"}
+        iter_parquet(schema, export_rows),
+        media_type="application/vnd.apache.parquet",
+        headers={"Content-Disposition": "attachment; filename=invoices.parquet"}
     )
 
 
+@router.get("/extractions/metrics", response_model=ExtractionMetrics)
+def get_extraction_metrics(current_user: User = Depends(get_current_user)):
+    """PDF extraction throughput for this server process"""
+    return ExtractionMetrics(**extraction_metrics.snapshot())
+
+
 @router.get("/{invoice_id}", response_model=InvoiceResponse)
 def get_invoice(
     invoice_id: int,
@@ -155,15 +238,9 @@ def get_invoice(
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific invoice"""
-    # Get station IDs for this organization
-    org_stations = db.query(Station.id).filter(
-        Station.organization_id == current_user.organization_id
-    ).all()
-    org_station_ids = [s.id for s in org_stations]
-
     invoice = db.query(Invoice).filter(
         Invoice.id == invoice_id,
-        Invoice.station_id.in_(org_station_ids)
+        org_station_filter(Invoice.station_id, current_user.organization_id)
     ).first()
 
     if not invoice:
@@ -172,23 +249,19 @@ def get_invoice(
             detail="Invoice not found"
         )
 
-    return get_invoice_response(invoice, db)
+    return get_invoice_response(invoice, get_dimension_names(db, current_user.organization_id))
 
 
 @router.post("", response_model=InvoiceResponse, status_code=status.HTTP_201_CREATED)
 def create_invoice(
     invoice_data: InvoiceCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new invoice"""
     # Verify station belongs to organization
-    station = db.query(Station).filter(
-        Station.id == invoice_data.station_id,
-        Station.organization_id == current_user.organization_id
-    ).first()
-
-    if not station:
+    if not owns_station(db, current_user.organization_id, invoice_data.station_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid station"
@@ -202,15 +275,228 @@ def create_invoice(
         total_amount=total_amount
     )
     db.add(invoice)
+    apply_invoice(db, invoice)
     db.commit()
     db.refresh(invoice)
 
-    return get_invoice_response(invoice, db)
+    # Refresh stored cost and profit of sales dated on or after this invoice
+    background_tasks.add_task(
+        recompute_sale_costs_job, invoice.station_id, invoice.fuel_type_id, invoice.invoice_date
+    )
+
+    return get_invoice_response(invoice, get_dimension_names(db, current_user.organization_id))
+
+
+def parse_import_date(value: str) -> Any:
+    """Accept ISO dates and the MM/DD/YYYY dates on supplier statements"""
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return value  # Let validation report it
+
+
+def map_import_row(
+    row: Dict[str, str],
+    columns: Dict[str, str],
+    station_ids_by_name: Dict[str, int],
+    fuel_type_ids_by_name: Dict[str, int],
+    default_supplier: Optional[str]
+) -> Dict[str, Any]:
+    """Map a supplier CSV row to InvoiceCreate fields, resolving station and fuel-type names"""
+    def cell(field: str) -> Optional[str]:
+        value = row.get(columns[field]) if field in columns else None
+        value = value.strip() if value else ""
+        return value or None
+
+    def number(field: str) -> Optional[str]:
+        value = cell(field)
+        return value.replace(",", "").replace("$", "") if value else value
+
+    station_id = cell("station_id")
+    if station_id is None and cell("station") is not None:
+        station_id = station_ids_by_name.get(cell("station").lower())
+        if station_id is None:
+            raise ValueError(f"Unknown station '{cell('station')}'")
+
+    fuel_type_id = cell("fuel_type_id")
+    if fuel_type_id is None and cell("fuel_type") is not None:
+        fuel_type_id = fuel_type_ids_by_name.get(cell("fuel_type").lower())
+        if fuel_type_id is None:
+            raise ValueError(f"Unknown fuel type '{cell('fuel_type')}'")
+
+    # Terminal and carrier go into notes in the same form as the seeded statements
+    notes = [
+        f"{label}: {cell(field)}"
+        for field, label in (("terminal", "Terminal"), ("carrier", "Carrier"))
+        if cell(field)
+    ]
+    if cell("notes"):
+        notes.append(cell("notes"))
+
+    return {
+        "invoice_number": cell("invoice_number"),
+        "invoice_date": parse_import_date(cell("invoice_date")) if cell("invoice_date") else None,
+        "supplier_name": cell("supplier_name") or default_supplier,
+        "station_id": station_id,
+        "fuel_type_id": fuel_type_id,
+        "quantity": number("quantity"),
+        "price_per_unit": number("price_per_unit"),
+        "notes": ", ".join(notes) or None,
+    }
+
+
+@router.post("/import", response_model=InvoiceImportResult)
+def import_invoices(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    supplier_name: Optional[str] = Form(None, description="Supplier for files without a supplier column"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import a supplier CSV statement. The file is read row by row and inserted in
+    batched transactions; rows whose invoice number already exists for the same station and
+    fuel type are reported as duplicates (a multi-product statement shares one number).
+    """
+    reader = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8-sig", newline=""))
+
+    # Cached lookups for resolving names, keyed case-insensitively
+    org_station_names = get_station_names(db, current_user.organization_id)
+    station_ids_by_name = {name.strip().lower(): station_id for station_id, name in org_station_names.items()}
+    fuel_type_names = get_fuel_type_names(db)
+    fuel_type_ids_by_name = {name.strip().lower(): fuel_type_id for fuel_type_id, name in fuel_type_names.items()}
+
+    created = 0
+    duplicate_count = 0
+    error_count = 0
+    duplicates: List[DuplicateInvoice] = []
+    errors: List[BulkRowError] = []
+    # (invoice number, station, fuel type) of the lines imported so far
+    seen_lines: Set[Tuple[str, int, int]] = set()
+    # Earliest committed date per (station, fuel type), for the sale cost refresh
+    affected: Dict[Tuple[int, int], date] = {}
+
+    def report_error(row_number: int, message: str):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ROWS:
+            errors.append(BulkRowError(row=row_number, error=message))
+
+    def flush(batch: List[Tuple[int, InvoiceCreate]]):
+        nonlocal created, duplicate_count
+        numbers = {invoice_data.invoice_number for _, invoice_data in batch if invoice_data.invoice_number}
+        existing_lines = set()
+        if numbers:
+            existing_lines = set(db.query(Invoice.invoice_number, Invoice.station_id, Invoice.fuel_type_id).filter(
+                org_station_filter(Invoice.station_id, current_user.organization_id),
+                Invoice.invoice_number.in_(numbers)
+            ).all())
+
+        invoices = []
+        batch_affected: Dict[Tuple[int, int], date] = {}
+        for row_number, invoice_data in batch:
+            number = invoice_data.invoice_number
+            line = (number, invoice_data.station_id, invoice_data.fuel_type_id)
+            if number and (line in existing_lines or line in seen_lines):
+                duplicate_count += 1
+                if len(duplicates) < MAX_REPORTED_ROWS:
+                    duplicates.append(DuplicateInvoice(row=row_number, invoice_number=number))
+                continue
+            if number:
+                seen_lines.add(line)
+
+            invoices.append({
+                **invoice_data.model_dump(),
+                "total_amount": invoice_data.quantity * invoice_data.price_per_unit
+            })
+            key = (invoice_data.station_id, invoice_data.fuel_type_id)
+            batch_affected[key] = min(batch_affected.get(key, invoice_data.invoice_date), invoice_data.invoice_date)
+
+        if invoices:
+            db.execute(insert(Invoice), invoices)
+            apply_invoices_bulk(db, invoices)
+            db.commit()
+            created += len(invoices)
+            for key, from_date in batch_affected.items():
+                affected[key] = min(affected.get(key, from_date), from_date)
+
+    try:
+        columns = match_columns(reader.fieldnames, IMPORT_COLUMN_ALIASES)
+        missing = [
+            label for label, fields in (
+                ("invoice date", ("invoice_date",)),
+                ("station", ("station", "station_id")),
+                ("fuel type", ("fuel_type", "fuel_type_id")),
+                ("quantity", ("quantity",)),
+                ("price", ("price_per_unit",)),
+            )
+            if not any(field in columns for field in fields)
+        ]
+        if "supplier_name" not in columns and not supplier_name:
+            missing.append("supplier (or the supplier_name form field)")
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Missing CSV columns: {', '.join(missing)}"
+            )
+
+        batch: List[Tuple[int, InvoiceCreate]] = []
+        for row_number, row in enumerate(reader, start=1):
+            try:
+                invoice_data = InvoiceCreate.model_validate(map_import_row(
+                    row, columns, station_ids_by_name, fuel_type_ids_by_name, supplier_name
+                ))
+            except ValidationError as exc:
+                report_error(row_number, format_validation_error(exc))
+                continue
+            except ValueError as exc:
+                report_error(row_number, str(exc))
+                continue
+
+            if invoice_data.station_id not in org_station_names:
+                report_error(row_number, "Invalid station")
+            elif invoice_data.fuel_type_id not in fuel_type_names:
+                report_error(row_number, "Invalid fuel type")
+            else:
+                batch.append((row_number, invoice_data))
+
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                flush(batch)
+                batch = []
+
+        flush(batch)
+    except Exception as exc:
+        # An error response drops the background tasks, so refresh the stored cost and
+        # profit of the batches committed before the failure now
+        db.rollback()
+        for (station_id, fuel_type_id), from_date in affected.items():
+            recompute_sale_costs_job(station_id, fuel_type_id, from_date)
+        if isinstance(exc, (UnicodeDecodeError, csv.Error)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File is not a valid UTF-8 CSV"
+            )
+        raise
+
+    # Refresh stored cost and profit after the response
+    for (station_id, fuel_type_id), from_date in affected.items():
+        background_tasks.add_task(recompute_sale_costs_job, station_id, fuel_type_id, from_date)
+
+    return InvoiceImportResult(
+        created=created,
+        duplicate_count=duplicate_count,
+        error_count=error_count,
+        duplicates=duplicates,
+        errors=errors
+    )
 
 
 @router.post("/{invoice_id}/upload-pdf", response_model=InvoiceResponse)
 async def upload_invoice_pdf(
     invoice_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -223,61 +509,245 @@ async def upload_invoice_pdf(
             detail="Only PDF files are allowed"
         )
 
-    # Get station IDs for this organization
-    org_stations = db.query(Station.id).filter(
-        Station.organization_id == current_user.organization_id
-    ).all()
-    org_station_ids = [s.id for s in org_stations]
+    # Queries, commits and file moves run in the threadpool; only the upload itself
+    # is read on the event loop
+    invoice = await run_in_threadpool(lambda: db.query(Invoice).filter(
+        Invoice.id == invoice_id,
+        org_station_filter(Invoice.station_id, current_user.organization_id)
+    ).first())
+
+    if not invoice:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invoice not found"
+        )
+
+    # Stream the file to disk, then point the invoice at the shared copy of its content
+    upload = await receive_upload(file, UPLOAD_DIR, settings.MAX_PDF_UPLOAD_BYTES)
+    return await run_in_threadpool(
+        attach_uploaded_pdf, db, invoice, upload, background_tasks, current_user.organization_id
+    )
+
 
+def attach_uploaded_pdf(
+    db: Session,
+    invoice: Invoice,
+    upload: ReceivedUpload,
+    background_tasks: BackgroundTasks,
+    organization_id: int
+) -> InvoiceResponse:
+    """Store an uploaded PDF, point the invoice at it and queue its extraction (blocking)"""
+    try:
+        blob = add_pdf_reference(db, upload.tmp_path, upload.sha256, upload.size)
+    finally:
+        remove_file(upload.tmp_path)
+
+    released_path = release_pdf_reference(db, invoice.pdf_file_path)
+    invoice.pdf_file_path = blob.file_path
+    extraction = queue_extraction(db, invoice)
+    db.commit()
+    db.refresh(invoice)
+
+    # Read invoice fields from the PDF in the extraction pool
+    background_tasks.add_task(submit_extraction, [extraction.id], blob.file_path)
+
+    # The old file is deleted after the response if nothing else uses it
+    if released_path and released_path != blob.file_path:
+        background_tasks.add_task(collect_pdf_file, released_path)
+
+    return get_invoice_response(invoice, get_dimension_names(db, organization_id))
+
+
+@router.api_route("/{invoice_id}/pdf", methods=["GET", "HEAD"])
+def download_invoice_pdf(
+    invoice_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Download an invoice's PDF (supports Range and conditional requests)"""
     invoice = db.query(Invoice).filter(
         Invoice.id == invoice_id,
-        Invoice.station_id.in_(org_station_ids)
+        org_station_filter(Invoice.station_id, current_user.organization_id)
     ).first()
 
-    if not invoice:
+    if not invoice or not invoice.pdf_file_path:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Invoice not found"
+            detail="Invoice PDF not found"
         )
 
-    # Delete old file if exists
-    if invoice.pdf_file_path and os.path.exists(invoice.pdf_file_path):
-        os.remove(invoice.pdf_file_path)
+    return file_response(
+        request,
+        invoice.pdf_file_path,
+        media_type="application/pdf",
+        etag=pdf_etag(invoice.pdf_file_path),
+        filename=f"invoice-{invoice.invoice_number or invoice.id}.pdf"
+    )
 
-    # Save new file
-    file_ext = os.path.splitext(file.filename)[1]
-    unique_filename = f"{invoice_id}_{uuid.uuid4().hex}{file_ext}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
 
-    contents = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(contents)
+def get_invoice_extraction_row(db: Session, invoice_id: int, current_user: User):
+    """The invoice and its extraction, 404 if either is missing"""
+    invoice = db.query(Invoice).filter(
+        Invoice.id == invoice_id,
+        org_station_filter(Invoice.station_id, current_user.organization_id)
+    ).first()
+    extraction = invoice and db.query(InvoiceExtraction).filter(
+        InvoiceExtraction.invoice_id == invoice.id
+    ).first()
+
+    if not extraction:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invoice extraction not found"
+        )
+    return invoice, extraction
+
+
+@router.get("/{invoice_id}/extraction", response_model=InvoiceExtractionResponse)
+def get_invoice_extraction(
+    invoice_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Fields read from the invoice's PDF (status is pending until the worker finishes)"""
+    _, extraction = get_invoice_extraction_row(db, invoice_id, current_user)
+    return extraction
+
 
-    # Update invoice with file path
-    invoice.pdf_file_path = file_path
+@router.post("/{invoice_id}/extraction/confirm", response_model=List[InvoiceResponse])
+def confirm_invoice_extraction(
+    invoice_id: int,
+    background_tasks: BackgroundTasks,
+    replace_line: Optional[int] = Query(
+        None,
+        ge=0,
+        description="Index in proposal.lines of the line replacing the invoice's own (default: its fuel type)"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Apply the proposed fields. The invoice takes the line chosen by replace_line, else the
+    line for its fuel type, else the only matched line; other matched fuel lines become new
+    invoices sharing the PDF. Returns the updated invoice followed by any created ones.
+    """
+    invoice, extraction = get_invoice_extraction_row(db, invoice_id, current_user)
+    if extraction.status != STATUS_COMPLETED or extraction.pdf_file_path != invoice.pdf_file_path:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No completed extraction to confirm"
+        )
+
+    proposal = ExtractionProposal.model_validate(extraction.proposal)
+    header = {}
+    if proposal.invoice_number:
+        header["invoice_number"] = proposal.invoice_number
+    if proposal.invoice_date:
+        header["invoice_date"] = proposal.invoice_date
+    notes = [
+        f"{label}: {value}"
+        for label, value in (("Terminal", proposal.terminal), ("Carrier", proposal.carrier))
+        if value
+    ]
+    if notes:
+        header["notes"] = ", ".join(notes)
+
+    lines = [line for line in proposal.lines if line.fuel_type_id is not None]
+    if replace_line is not None:
+        if replace_line >= len(proposal.lines) or proposal.lines[replace_line].fuel_type_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Line {replace_line} is not a proposed line with a known fuel type"
+            )
+        own_line = proposal.lines[replace_line]
+    else:
+        own_line = next((line for line in lines if line.fuel_type_id == invoice.fuel_type_id), None)
+        if own_line is None and len(lines) == 1:
+            own_line = lines[0]
+        if own_line is None and lines:
+            # Keeping the invoice's own line next to the new ones would count its purchase twice
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="No proposed line matches the invoice's fuel type; choose the line that replaces it"
+            )
+
+    update_data = dict(header)
+    if own_line is not None:
+        update_data.update(
+            fuel_type_id=own_line.fuel_type_id,
+            quantity=own_line.quantity,
+            price_per_unit=own_line.price_per_unit
+        )
+    apply_invoice_update(db, invoice, update_data, background_tasks)
+
+    # Other fuel lines delivered on the same invoice
+    created = []
+    for line in lines:
+        if line is own_line:
+            continue
+        sibling = Invoice(
+            invoice_number=invoice.invoice_number,
+            invoice_date=invoice.invoice_date,
+            supplier_name=invoice.supplier_name,
+            station_id=invoice.station_id,
+            fuel_type_id=line.fuel_type_id,
+            quantity=line.quantity,
+            price_per_unit=line.price_per_unit,
+            total_amount=line.quantity * line.price_per_unit,
+            notes=invoice.notes,
+            pdf_file_path=invoice.pdf_file_path if retain_pdf_reference(db, invoice.pdf_file_path) else None
+        )
+        db.add(sibling)
+        apply_invoice(db, sibling)
+        background_tasks.add_task(
+            recompute_sale_costs_job, sibling.station_id, sibling.fuel_type_id, sibling.invoice_date
+        )
+        created.append(sibling)
+
+    extraction.status = STATUS_CONFIRMED
     db.commit()
-    db.refresh(invoice)
+    for row in [invoice, *created]:
+        db.refresh(row)
+
+    names = get_dimension_names(db, current_user.organization_id)
+    return [get_invoice_response(row, names) for row in [invoice, *created]]
+
 
-    return get_invoice_response(invoice, db)
+def apply_invoice_update(db: Session, invoice: Invoice, update_data: Dict[str, Any], background_tasks: BackgroundTasks):
+    """Set invoice fields, moving its rollup contribution and refreshing affected sale costs (caller commits)"""
+    # Move this invoice's contribution in the daily rollup
+    apply_invoice(db, invoice, sign=-1)
+    old_key = (invoice.station_id, invoice.fuel_type_id, invoice.invoice_date)
+
+    for field, value in update_data.items():
+        setattr(invoice, field, value)
+
+    # Recalculate total if quantity or price changed
+    invoice.total_amount = invoice.quantity * invoice.price_per_unit
+    apply_invoice(db, invoice)
+
+    # Refresh stored cost and profit of sales affected by the old and new values
+    new_key = (invoice.station_id, invoice.fuel_type_id, invoice.invoice_date)
+    if old_key[:2] == new_key[:2]:
+        background_tasks.add_task(recompute_sale_costs_job, *new_key[:2], min(old_key[2], new_key[2]))
+    else:
+        background_tasks.add_task(recompute_sale_costs_job, *old_key)
+        background_tasks.add_task(recompute_sale_costs_job, *new_key)
 
 
 @router.put("/{invoice_id}", response_model=InvoiceResponse)
 def update_invoice(
     invoice_id: int,
     invoice_data: InvoiceUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update an invoice"""
-    # Get station IDs for this organization
-    org_stations = db.query(Station.id).filter(
-        Station.organization_id == current_user.organization_id
-    ).all()
-    org_station_ids = [s.id for s in org_stations]
-
     invoice = db.query(Invoice).filter(
         Invoice.id == invoice_id,
-        Invoice.station_id.in_(org_station_ids)
+        org_station_filter(Invoice.station_id, current_user.organization_id)
     ).first()
 
     if not invoice:
@@ -290,44 +760,30 @@ def update_invoice(
 
     # If updating station, verify it belongs to org
     if "station_id" in update_data:
-        station = db.query(Station).filter(
-            Station.id == update_data["station_id"],
-            Station.organization_id == current_user.organization_id
-        ).first()
-        if not station:
+        if not owns_station(db, current_user.organization_id, update_data["station_id"]):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid station"
             )
 
-    for field, value in update_data.items():
-        setattr(invoice, field, value)
-
-    # Recalculate total if quantity or price changed
-    invoice.total_amount = invoice.quantity * invoice.price_per_unit
-
+    apply_invoice_update(db, invoice, update_data, background_tasks)
     db.commit()
     db.refresh(invoice)
 
-    return get_invoice_response(invoice, db)
+    return get_invoice_response(invoice, get_dimension_names(db, current_user.organization_id))
 
 
 @router.delete("/{invoice_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_invoice(
     invoice_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete an invoice"""
-    # Get station IDs for this organization
-    org_stations = db.query(Station.id).filter(
-        Station.organization_id == current_user.organization_id
-    ).all()
-    org_station_ids = [s.id for s in org_stations]
-
     invoice = db.query(Invoice).filter(
         Invoice.id == invoice_id,
-        Invoice.station_id.in_(org_station_ids)
+        org_station_filter(Invoice.station_id, current_user.organization_id)
     ).first()
 
     if not invoice:
@@ -336,9 +792,15 @@ def delete_invoice(
             detail="Invoice not found"
         )
 
-    # Delete PDF file if exists
-    if invoice.pdf_file_path and os.path.exists(invoice.pdf_file_path):
-        os.remove(invoice.pdf_file_path)
+    # Release the PDF; its file is deleted after the response if nothing else uses it
+    released_path = release_pdf_reference(db, invoice.pdf_file_path)
+    if released_path:
+        background_tasks.add_task(collect_pdf_file, released_path)
 
+    apply_invoice(db, invoice, sign=-1)
+    background_tasks.add_task(
+        recompute_sale_costs_job, invoice.station_id, invoice.fuel_type_id, invoice.invoice_date
+    )
+    db.query(InvoiceExtraction).filter(InvoiceExtraction.invoice_id == invoice.id).delete(synchronize_session=False)
     db.delete(invoice)
     db.commit()
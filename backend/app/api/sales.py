@@ -1,81 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, UploadFile, File
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from sqlalchemy import func, insert
+from pydantic import ValidationError
+from typing import Any, Dict, Iterable, List, Optional
 from datetime import date
 from decimal import Decimal
 import csv
 import io
 from app.db.database import get_db
-from app.models import Sale, Station, FuelType, Invoice, User
-from app.schemas import SaleCreate, SaleUpdate, SaleResponse
+from app.models import Sale, Station, FuelType, User
+from app.schemas import SaleCreate, SaleUpdate, SaleResponse, SalePage, BulkRowError, BulkCreateResult
 from app.api.deps import get_current_user
+from app.api.pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.api.export import iter_query_rows, iter_csv, iter_parquet, parquet_schema
+from app.api.bulk import format_validation_error
+from app.services.tenant_scope import org_station_filter, owns_station, org_station_ids
+from app.services.dimension_cache import DimensionNames, get_dimension_names, get_fuel_type_names
+from app.services.daily_summary import apply_sale, apply_sales_bulk
+from app.services.cost_basis import CostBasisIndex, sale_profit_fields
 
 router = APIRouter(prefix="/sales", tags=["Sales"])
 
+MAX_BULK_ROWS = 5000
+CENT = Decimal("0.01")
+SALE_CSV_COLUMNS = ["sale_date", "station_id", "fuel_type_id", "quantity_sold", "price_per_unit", "notes"]
+
 
 def get_average_cost_price(db: Session, station_id: int, fuel_type_id: int, sale_date: date) -> Optional[Decimal]:
     """Get the average cost price per gallon from recent invoices"""
-    # Get invoices for this station and fuel type up to the sale date
-    avg_price = db.query(func.avg(Invoice.price_per_unit)).filter(
-        Invoice.station_id == station_id,
-        Invoice.fuel_type_id == fuel_type_id,
-        Invoice.invoice_date <= sale_date
-    ).scalar()
-
-    return Decimal(str(avg_price)) if avg_price else None
-
-
-def get_sale_response(sale: Sale, db: Session) -> SaleResponse:
-    """Helper to build sale response with related names and profit calculations"""
-    station = db.query(Station).filter(Station.id == sale.station_id).first()
-    fuel_type = db.query(FuelType).filter(FuelType.id == sale.fuel_type_id).first()
-
-    # Calculate profit margin
-    cost_price = get_average_cost_price(db, sale.station_id, sale.fuel_type_id, sale.sale_date)
-    profit_margin = None
-    total_profit = None
+    # Same running average the bulk and recompute paths use, over invoices up to the sale date
+    cost_index = CostBasisIndex.build(db, [station_id], fuel_type_id, until=sale_date)
+    return cost_index.average_cost_price(station_id, fuel_type_id, sale_date)
 
-    if cost_price:
-        profit_margin = sale.price_per_unit - cost_price
-        total_profit = profit_margin * sale.quantity_sold
 
+def get_sale_response(sale: Sale, names: DimensionNames) -> SaleResponse:
+    """Helper to build sale response with related names and stored profit calculations"""
     return SaleResponse(
         id=sale.id,
         sale_date=sale.sale_date,
         station_id=sale.station_id,
-        station_name=station.name if station else "Unknown",
+        station_name=names.station_name(sale.station_id),
         fuel_type_id=sale.fuel_type_id,
-        fuel_type_name=fuel_type.name if fuel_type else "Unknown",
+        fuel_type_name=names.fuel_type_name(sale.fuel_type_id),
         quantity_sold=sale.quantity_sold,
         price_per_unit=sale.price_per_unit,
         total_sales=sale.total_sales,
-        cost_price=cost_price,
-        profit_margin=profit_margin,
-        total_profit=total_profit,
+        cost_price=sale.cost_price,
+        profit_margin=sale.profit_margin,
+        total_profit=sale.total_profit,
         notes=sale.notes,
         created_at=sale.created_at
     )
 
 
-@router.get("", response_model=List[SaleResponse])
+@router.get("", response_model=SalePage)
 def get_sales(
     station_id: Optional[int] = Query(None),
     fuel_type_id: Optional[int] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(False, description="Also count and total all matching rows"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all sales for the current user's organization with optional filters"""
-    # Get station IDs for this organization
-    org_stations = db.query(Station.id).filter(
-        Station.organization_id == current_user.organization_id
-    ).all()
-    org_station_ids = [s.id for s in org_stations]
-
-    query = db.query(Sale).filter(Sale.station_id.in_(org_station_ids))
+    """Get a page of sales for the current user's organization with optional filters"""
+    query = db.query(Sale).filter(org_station_filter(Sale.station_id, current_user.organization_id))
 
     if station_id:
         query = query.filter(Sale.station_id == station_id)
@@ -86,9 +78,86 @@ def get_sales(
     if end_date:
         query = query.filter(Sale.sale_date <= end_date)
 
-    sales = query.order_by(Sale.sale_date.desc()).all()
+    totals = {}
+    if include_total:
+        # Totals of the whole filtered set, not just the pages loaded so far
+        total_count, total_sales, total_profit = query.with_entities(
+            func.count(Sale.id), func.sum(Sale.total_sales), func.sum(Sale.total_profit)
+        ).one()
+        totals = {
+            "total_count": total_count,
+            "total_sales": Decimal(str(total_sales or 0)).quantize(CENT),
+            "total_profit": Decimal(str(total_profit or 0)).quantize(CENT)
+        }
+    sales, next_cursor = paginate(query, Sale.sale_date, Sale.id, cursor, limit)
+    names = get_dimension_names(db, current_user.organization_id)
+
+    return SalePage(
+        items=[get_sale_response(sale, names) for sale in sales],
+        next_cursor=next_cursor,
+        **totals
+    )
 
-    return [get_sale_response(sale, db) for sale in sales]
+
+SALES_CSV_HEADER = [
+    "Date", "Station", "Fuel Type", "Qty Sold (gal)", "Selling Price ($)",
+    "Total Sales ($)", "Cost Price ($)", "Profit Margin ($)", "Total Profit ($)", "Notes"
+]
+
+SALES_PARQUET_COLUMNS = [
+    ("sale_date", "date"),
+    ("station", "string"),
+    ("fuel_type", "string"),
+    ("quantity_sold", ("decimal", 12, 2)),
+    ("price_per_unit", ("decimal", 10, 2)),
+    ("total_sales", ("decimal", 14, 2)),
+    ("cost_price", ("decimal", 10, 4)),
+    ("profit_margin", ("decimal", 10, 4)),
+    ("total_profit", ("decimal", 14, 2)),
+    ("notes", "string"),
+]
+
+
+def get_export_rows(
+    current_user: User,
+    station_id: Optional[int],
+    fuel_type_id: Optional[int],
+    start_date: Optional[date],
+    end_date: Optional[date]
+):
+    """Iterate filtered sales for export as (date, station, fuel type, ...) tuples, in batches"""
+    # Organization scope comes from the station join
+    filters = [Station.organization_id == current_user.organization_id]
+
+    if station_id:
+        filters.append(Sale.station_id == station_id)
+    if fuel_type_id:
+        filters.append(Sale.fuel_type_id == fuel_type_id)
+    if start_date:
+        filters.append(Sale.sale_date >= start_date)
+    if end_date:
+        filters.append(Sale.sale_date <= end_date)
+
+    def build_query(export_db: Session):
+        # Names come from the join, rows are fetched in batches
+        return export_db.query(
+            Sale.sale_date,
+            func.coalesce(Station.name, "Unknown"),
+            func.coalesce(FuelType.name, "Unknown"),
+            Sale.quantity_sold,
+            Sale.price_per_unit,
+            Sale.total_sales,
+            Sale.cost_price,
+            Sale.profit_margin,
+            Sale.total_profit,
+            Sale.notes
+        ).join(
+            Station, Station.id == Sale.station_id
+        ).outerjoin(
+            FuelType, FuelType.id == Sale.fuel_type_id
+        ).filter(*filters).order_by(Sale.sale_date.desc(), Sale.id.desc())
+
+    return iter_query_rows(build_query)
 
 
 @router.get("/export/csv")
@@ -97,66 +166,51 @@ def export_sales_csv(
     fuel_type_id: Optional[int] = Query(None),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Export sales to CSV"""
-    # Get station IDs for this organization
-    org_stations = db.query(Station.id).filter(
-        Station.organization_id == current_user.organization_id
-    ).all()
-    org_station_ids = [s.id for s in org_stations]
+    """Export sales to CSV, streamed in chunks"""
+    export_rows = get_export_rows(current_user, station_id, fuel_type_id, start_date, end_date)
+
+    rows = (
+        [
+            sale_date.strftime("%Y-%m-%d"),
+            station_name,
+            fuel_type_name,
+            float(quantity_sold),
+            float(price_per_unit),
+            float(total_sales),
+            float(cost_price) if cost_price is not None else "",
+            float(profit_margin) if profit_margin is not None else "",
+            float(total_profit) if total_profit is not None else "",
+            notes or ""
+        ]
+        for (sale_date, station_name, fuel_type_name, quantity_sold, price_per_unit, total_sales,
+             cost_price, profit_margin, total_profit, notes) in export_rows
+    )
 
-    query = db.query(Sale).filter(Sale.station_id.in_(org_station_ids))
+    return StreamingResponse(
+        iter_csv(SALES_CSV_HEADER, rows),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=sales.csv"}
+    )
 
-    if station_id:
-        query = query.filter(Sale.station_id == station_id)
-    if fuel_type_id:
-        query = query.filter(Sale.fuel_type_id == fuel_type_id)
-    if start_date:
-        query = query.filter(Sale.sale_date >= start_date)
-    if end_date:
-        query = query.filter(Sale.sale_date <= end_date)
 
-    sales = query.order_by(Sale.sale_date.desc()).all()
-
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Header row
-    writer.writerow([
-        "Date", "Station", "Fuel Type", "Qty Sold (gal)", "Selling Price ($)",
-        "Total Sales ($)", "Cost Price ($)", "Profit Margin ($)", "Total Profit ($)", "Notes"
-    ])
-
-    # Data rows
-    for sale in sales:
-        station = db.query(Station).filter(Station.id == sale.station_id).first()
-        fuel_type = db.query(FuelType).filter(FuelType.id == sale.fuel_type_id).first()
-        cost_price = get_average_cost_price(db, sale.station_id, sale.fuel_type_id, sale.sale_date)
-        profit_margin = float(sale.price_per_unit - cost_price) if cost_price else ""
-        total_profit = float(profit_margin * sale.quantity_sold) if cost_price else ""
-
-        writer.writerow([
-            sale.sale_date.strftime("%Y-%m-%d"),
-            station.name if station else "Unknown",
-            fuel_type.name if fuel_type else "Unknown",
-            float(sale.quantity_sold),
-            float(sale.price_per_unit),
-            float(sale.total_sales),
-            float(cost_price) if cost_price else "",
-            profit_margin,
-            total_profit,
-            sale.notes or ""
-        ])
-
-    output.seek(0)
+@router.get("/export/parquet")
+def export_sales_parquet(
+    station_id: Optional[int] = Query(None),
+    fuel_type_id: Optional[int] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_user: User = Depends(get_current_user)
+):
+    """Export sales to Parquet with exact decimal columns, streamed by row group"""
+    schema = parquet_schema(SALES_PARQUET_COLUMNS)
+    export_rows = get_export_rows(current_user, station_id, fuel_type_id, start_date, end_date)
 
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=sales.csv"}
+        iter_parquet(schema, export_rows),
+        media_type="application/vnd.apache.parquet",
+        headers={"Content-Disposition": "attachment; filename=sales.parquet"}
     )
 
 
@@ -167,15 +221,9 @@ def get_sale(
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific sale"""
-    # Get station IDs for this organization
-    org_stations = db.query(Station.id).filter(
-        Station.organization_id == current_user.organization_id
-    ).all()
-    org_station_ids = [s.id for s in org_stations]
-
     sale = db.query(Sale).filter(
         Sale.id == sale_id,
-        Sale.station_id.in_(org_station_ids)
+        org_station_filter(Sale.station_id, current_user.organization_id)
     ).first()
 
     if not sale:
@@ -184,7 +232,7 @@ def get_sale(
             detail="Sale not found"
         )
 
-    return get_sale_response(sale, db)
+    return get_sale_response(sale, get_dimension_names(db, current_user.organization_id))
 
 
 @router.post("", response_model=SaleResponse, status_code=status.HTTP_201_CREATED)
@@ -195,12 +243,7 @@ def create_sale(
 ):
     """Create a new sale entry"""
     # Verify station belongs to organization
-    station = db.query(Station).filter(
-        Station.id == sale_data.station_id,
-        Station.organization_id == current_user.organization_id
-    ).first()
-
-    if not station:
+    if not owns_station(db, current_user.organization_id, sale_data.station_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid station"
@@ -209,15 +252,115 @@ def create_sale(
     # Calculate total
     total_sales = sale_data.quantity_sold * sale_data.price_per_unit
 
+    # Store cost and profit at write time
+    cost_price = get_average_cost_price(db, sale_data.station_id, sale_data.fuel_type_id, sale_data.sale_date)
+
     sale = Sale(
         **sale_data.model_dump(),
-        total_sales=total_sales
+        total_sales=total_sales,
+        **sale_profit_fields(sale_data.price_per_unit, sale_data.quantity_sold, cost_price)
     )
     db.add(sale)
+    apply_sale(db, sale)
     db.commit()
     db.refresh(sale)
 
-    return get_sale_response(sale, db)
+    return get_sale_response(sale, get_dimension_names(db, current_user.organization_id))
+
+
+def bulk_create_sales(db: Session, current_user: User, raw_rows: Iterable[Dict[str, Any]]) -> BulkCreateResult:
+    """
+    Validate rows individually and insert the valid ones in one executemany.
+    Invalid rows are reported and skipped; valid rows are still inserted.
+    """
+    # Station ownership and fuel types are checked once for the whole batch
+    station_ids = org_station_ids(db, current_user.organization_id)
+    fuel_type_ids = set(get_fuel_type_names(db))
+
+    valid_rows: List[SaleCreate] = []
+    errors: List[BulkRowError] = []
+    for row_number, raw_row in enumerate(raw_rows, start=1):
+        if row_number > MAX_BULK_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_BULK_ROWS} rows per request"
+            )
+
+        try:
+            sale_data = SaleCreate.model_validate(raw_row)
+        except ValidationError as exc:
+            errors.append(BulkRowError(row=row_number, error=format_validation_error(exc)))
+            continue
+
+        if sale_data.station_id not in station_ids:
+            errors.append(BulkRowError(row=row_number, error="Invalid station"))
+        elif sale_data.fuel_type_id not in fuel_type_ids:
+            errors.append(BulkRowError(row=row_number, error="Invalid fuel type"))
+        else:
+            valid_rows.append(sale_data)
+
+    if valid_rows:
+        cost_index = CostBasisIndex.build(db, {sale_data.station_id for sale_data in valid_rows})
+
+        sales = []
+        for sale_data in valid_rows:
+            cost_price = cost_index.average_cost_price(
+                sale_data.station_id, sale_data.fuel_type_id, sale_data.sale_date
+            )
+            sales.append({
+                **sale_data.model_dump(),
+                "total_sales": sale_data.quantity_sold * sale_data.price_per_unit,
+                **sale_profit_fields(sale_data.price_per_unit, sale_data.quantity_sold, cost_price)
+            })
+
+        db.execute(insert(Sale), sales)
+        apply_sales_bulk(db, sales)
+        db.commit()
+
+    return BulkCreateResult(created=len(valid_rows), errors=errors)
+
+
+@router.post("/bulk", response_model=BulkCreateResult)
+def create_sales_bulk(
+    rows: List[Dict[str, Any]] = Body(..., description="Array of sale entries shaped like SaleCreate"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create many sale entries in one transaction, reporting per-row errors"""
+    return bulk_create_sales(db, current_user, rows)
+
+
+@router.post("/bulk/csv", response_model=BulkCreateResult)
+def create_sales_bulk_csv(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create sale entries from a CSV upload with SaleCreate field names as the header"""
+    reader = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8-sig", newline=""))
+
+    try:
+        missing = [
+            column for column in SALE_CSV_COLUMNS
+            if column != "notes" and column not in (reader.fieldnames or [])
+        ]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Missing CSV columns: {', '.join(missing)}"
+            )
+
+        # Empty cells are treated as missing values
+        rows = (
+            {column: value for column, value in row.items() if column in SALE_CSV_COLUMNS and value != ""}
+            for row in reader
+        )
+        return bulk_create_sales(db, current_user, rows)
+    except (UnicodeDecodeError, csv.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File is not a valid UTF-8 CSV"
+        )
 
 
 @router.put("/{sale_id}", response_model=SaleResponse)
@@ -228,15 +371,9 @@ def update_sale(
     current_user: User = Depends(get_current_user)
 ):
     """Update a sale entry"""
-    # Get station IDs for this organization
-    org_stations = db.query(Station.id).filter(
-        Station.organization_id == current_user.organization_id
-    ).all()
-    org_station_ids = [s.id for s in org_stations]
-
     sale = db.query(Sale).filter(
         Sale.id == sale_id,
-        Sale.station_id.in_(org_station_ids)
+        org_station_filter(Sale.station_id, current_user.organization_id)
     ).first()
 
     if not sale:
@@ -249,26 +386,32 @@ def update_sale(
 
     # If updating station, verify it belongs to org
     if "station_id" in update_data:
-        station = db.query(Station).filter(
-            Station.id == update_data["station_id"],
-            Station.organization_id == current_user.organization_id
-        ).first()
-        if not station:
+        if not owns_station(db, current_user.organization_id, update_data["station_id"]):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid station"
             )
 
+    # Move this sale's contribution in the daily rollup
+    apply_sale(db, sale, sign=-1)
+
     for field, value in update_data.items():
         setattr(sale, field, value)
 
     # Recalculate total if quantity or price changed
     sale.total_sales = sale.quantity_sold * sale.price_per_unit
 
+    # Refresh stored cost and profit
+    cost_price = get_average_cost_price(db, sale.station_id, sale.fuel_type_id, sale.sale_date)
+    for field, value in sale_profit_fields(sale.price_per_unit, sale.quantity_sold, cost_price).items():
+        setattr(sale, field, value)
+
+    apply_sale(db, sale)
+
     db.commit()
     db.refresh(sale)
 
-    return get_sale_response(sale, db)
+    return get_sale_response(sale, get_dimension_names(db, current_user.organization_id))
 
 
 @router.delete("/{sale_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -278,15 +421,9 @@ def delete_sale(
     current_user: User = Depends(get_current_user)
 ):
     """Delete a sale entry"""
-    # Get station IDs for this organization
-    org_stations = db.query(Station.id).filter(
-        Station.organization_id == current_user.organization_id
-    ).all()
-    org_station_ids = [s.id for s in org_stations]
-
     sale = db.query(Sale).filter(
         Sale.id == sale_id,
-        Sale.station_id.in_(org_station_ids)
+        org_station_filter(Sale.station_id, current_user.organization_id)
     ).first()
 
     if not sale:
@@ -295,5 +432,6 @@ def delete_sale(
             detail="Sale not found"
         )
 
+    apply_sale(db, sale, sign=-1)
     db.delete(sale)
     db.commit()
@@ -2,9 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.database import get_db
-from app.models import Station, User
+from app.models import Station, User, DailyStationFuelSummary
 from app.schemas import StationCreate, StationUpdate, StationResponse
 from app.api.deps import get_current_user
+from app.services.dimension_cache import invalidate_stations
+from app.services.dashboard_cache import invalidate_organization_dashboards
 
 router = APIRouter(prefix="/stations", tags=["Stations"])
 
@@ -55,6 +57,8 @@ def create_station(
     db.add(station)
     db.commit()
     db.refresh(station)
+    invalidate_stations(current_user.organization_id)
+    invalidate_organization_dashboards(current_user.organization_id)
     return station
 
 
@@ -83,6 +87,8 @@ def update_station(
 
     db.commit()
     db.refresh(station)
+    invalidate_stations(current_user.organization_id)
+    invalidate_organization_dashboards(current_user.organization_id)
     return station
 
 
@@ -104,5 +110,10 @@ def delete_station(
             detail="Station not found"
         )
 
+    db.query(DailyStationFuelSummary).filter(
+        DailyStationFuelSummary.station_id == station.id
+    ).delete(synchronize_session=False)
     db.delete(station)
     db.commit()
+    invalidate_stations(current_user.organization_id)
+    invalidate_organization_dashboards(current_user.organization_id)
@@ -0,0 +1,51 @@
+"""Helpers for writing uploaded files to disk without blocking the event loop"""
+import hashlib
+import os
+import uuid
+from typing import NamedTuple
+import aiofiles
+from fastapi import HTTPException, UploadFile, status
+
+# Bytes read from the upload and written per step
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class ReceivedUpload(NamedTuple):
+    tmp_path: str
+    size: int
+    sha256: str
+
+
+async def receive_upload(file: UploadFile, directory: str, max_bytes: int) -> ReceivedUpload:
+    """
+    Stream an upload in chunks to a temp file in `directory`, hashing it on the way.
+    The caller moves the temp file into place (or removes it). Raises 413, leaving
+    nothing behind, if the upload exceeds max_bytes.
+    """
+    tmp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File exceeds the {max_bytes // (1024 * 1024)} MB limit"
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        # Synchronous so cleanup still happens if the request is cancelled
+        remove_file(tmp_path)
+        raise
+    return ReceivedUpload(tmp_path, size, digest.hexdigest())
+
+
+def remove_file(path: str) -> None:
+    """Delete a file if it still exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -10,16 +10,43 @@ class Settings(BaseSettings):
     # Database - Using SQLite for easy local development (no PostgreSQL needed)
     DATABASE_URL: str = "sqlite:///./gasstation.db"
 
+    # Connection pool (per process): size it to the worker threads that hit the database
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced; -1 = never
+
+    # SQLite pragmas applied to every connection
+    SQLITE_JOURNAL_MODE: str = "WAL"  # Readers don't block the writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # Safe with WAL; FULL fsyncs every commit
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait for the write lock instead of "database is locked"
+
     # JWT
     SECRET_KEY: str = "your-secret-key-change-in-production-minimum-32-characters"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    USER_STATUS_CACHE_SECONDS: int = 60  # How long a disabled account may keep working
+
+    # Password hashing pool: bcrypt threads, and requests allowed to wait for one
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Dashboard response cache (per process); writes through the API invalidate it
+    DASHBOARD_CACHE_SECONDS: int = 300
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 1024
 
     # Demo Account
     DEMO_EMAIL: str = "demo@gasstation.com"
     DEMO_PASSWORD: str = "demo123"
     AUTO_SEED_DEMO: bool = True
 
+    # Largest accepted invoice PDF upload
+    MAX_PDF_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    PDF_EXTRACTION_WORKERS: int = 0  # Processes reading uploaded PDFs; 0 = one per CPU
+
     # Frontend URL for CORS (set in production)
     FRONTEND_URL: str = ""
 
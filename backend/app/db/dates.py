@@ -0,0 +1,65 @@
+"""
+Date truncation for time buckets (day, week, month).
+
+truncate_date() builds the SQL expression for the connected dialect, so
+aggregates can GROUP BY the bucket in the database; bucket_start() and
+next_bucket() give the same buckets in Python for zero-filling. Weeks start on
+Monday (ISO weeks, as PostgreSQL's date_trunc uses).
+"""
+from datetime import date, timedelta
+from sqlalchemy import Date, cast, func, literal_column
+
+DAY = "day"
+WEEK = "week"
+MONTH = "month"
+
+
+def truncate_date(dialect_name: str, column, unit: str):
+    """SQL expression for the first day of the unit containing column's date"""
+    if unit == DAY:
+        return column
+    if unit not in (WEEK, MONTH):
+        raise ValueError(f"Unknown date unit: {unit}")
+    # Literals rather than bind parameters, so the same expression can appear in
+    # SELECT and GROUP BY (PostgreSQL rejects them as different expressions otherwise)
+    if dialect_name == "sqlite":
+        if unit == WEEK:
+            # Forward to the week's Sunday (or stay on it), then back to its Monday
+            return func.date(column, literal_column("'weekday 0'"), literal_column("'-6 days'"), type_=Date)
+        return func.date(column, literal_column("'start of month'"), type_=Date)
+    return cast(func.date_trunc(literal_column(f"'{unit}'"), column), Date)
+
+
+def bucket_start(day: date, unit: str) -> date:
+    if unit == WEEK:
+        return day - timedelta(days=day.weekday())
+    if unit == MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, unit: str) -> date:
+    if unit == WEEK:
+        return start + timedelta(days=7)
+    if unit == MONTH:
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_count(start: date, end: date, unit: str) -> int:
+    """Number of buckets of the unit touched by the range start..end"""
+    if end < start:
+        return 0
+    if unit == WEEK:
+        return (bucket_start(end, WEEK) - bucket_start(start, WEEK)).days // 7 + 1
+    if unit == MONTH:
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return (end - start).days + 1
+
+
+def choose_date_unit(start: date, end: date, max_buckets: int) -> str:
+    """Finest unit that keeps the range within max_buckets (months if none does)"""
+    for unit in (DAY, WEEK):
+        if bucket_count(start, end, unit) <= max_buckets:
+            return unit
+    return MONTH
@@ -0,0 +1,40 @@
+"""
+Bring the database schema up to date before the app or a script uses it.
+
+New databases get the current schema from create_all and are stamped at the
+latest Alembic revision. Databases created by an earlier version (including the
+bundled gasstation.db) are upgraded with the Alembic migrations, which add and
+backfill what create_all can't: columns on existing tables, and rollups of
+existing rows.
+"""
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+from app.db.database import Base
+from app.db.search import ensure_invoice_search
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic")
+
+
+def alembic_config(connection: Connection) -> Config:
+    """Alembic config running on an open connection"""
+    # No alembic.ini: its logging setup would replace the server's
+    config = Config()
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    config.attributes["connection"] = connection
+    return config
+
+
+def upgrade_database(engine: Engine) -> None:
+    """Create a new database at the latest revision, or migrate an existing one to it"""
+    with engine.begin() as connection:
+        if inspect(connection).has_table("sales"):
+            command.upgrade(alembic_config(connection), "head")
+        else:
+            Base.metadata.create_all(bind=connection)
+            command.stamp(alembic_config(connection), "head")
+
+    # Invoice search index for databases created before it existed
+    ensure_invoice_search(engine)
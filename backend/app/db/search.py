@@ -0,0 +1,155 @@
+"""
+Invoice search index.
+
+SQLite: an FTS5 table with the trigram tokenizer over invoice_number,
+supplier_name and notes, kept in sync with invoices by triggers.
+PostgreSQL: a pg_trgm GIN index on the same columns.
+
+Both serve case-insensitive substring searches, like the ILIKE they replace,
+without scanning every invoice. The index is created with the invoices table
+and by ensure_invoice_search() at startup for existing databases. Other
+databases, and terms shorter than a trigram, fall back to ILIKE.
+"""
+import logging
+from typing import List
+from sqlalchemy import Integer, String, column, event, literal_column, or_, text
+from sqlalchemy.engine import Connection, Engine
+from app.models import Invoice
+
+logger = logging.getLogger(__name__)
+
+MIN_INDEXED_TERM_LENGTH = 3
+
+_SQLITE_STATEMENTS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS invoice_search USING fts5(
+        invoice_number, supplier_name, notes,
+        content='invoices', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS invoice_search_ai AFTER INSERT ON invoices BEGIN
+        INSERT INTO invoice_search(rowid, invoice_number, supplier_name, notes)
+        VALUES (new.id, new.invoice_number, new.supplier_name, new.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS invoice_search_ad AFTER DELETE ON invoices BEGIN
+        INSERT INTO invoice_search(invoice_search, rowid, invoice_number, supplier_name, notes)
+        VALUES ('delete', old.id, old.invoice_number, old.supplier_name, old.notes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS invoice_search_au
+    AFTER UPDATE OF invoice_number, supplier_name, notes ON invoices BEGIN
+        INSERT INTO invoice_search(invoice_search, rowid, invoice_number, supplier_name, notes)
+        VALUES ('delete', old.id, old.invoice_number, old.supplier_name, old.notes);
+        INSERT INTO invoice_search(rowid, invoice_number, supplier_name, notes)
+        VALUES (new.id, new.invoice_number, new.supplier_name, new.notes);
+    END
+    """,
+]
+
+# Must match search_document() below for the planner to use the index
+_POSTGRES_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS ix_invoices_search_trgm ON invoices USING gin (
+        (coalesce(invoice_number, '') || ' ' || supplier_name || ' ' || coalesce(notes, '')) gin_trgm_ops
+    )
+    """,
+]
+
+# Dialect whose index is in place, set by install_invoice_search
+_indexed_dialect = None
+
+
+def install_invoice_search(connection: Connection) -> bool:
+    """Create the search index if missing (idempotent); False if the database can't support it"""
+    global _indexed_dialect
+    dialect = connection.dialect.name
+
+    try:
+        with connection.begin_nested():
+            if dialect == "sqlite":
+                # Triggers go away with a dropped invoices table, so a missing one
+                # means the index has to be (re)built from the current rows
+                had_triggers = connection.execute(text(
+                    "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'invoice_search_%'"
+                )).scalar() == 3
+                for statement in _SQLITE_STATEMENTS:
+                    connection.execute(text(statement))
+                if not had_triggers:
+                    connection.execute(text("INSERT INTO invoice_search(invoice_search) VALUES ('rebuild')"))
+            elif dialect == "postgresql":
+                for statement in _POSTGRES_STATEMENTS:
+                    connection.execute(text(statement))
+            else:
+                return False
+    except Exception as exc:
+        # e.g. SQLite built without FTS5/trigram, or no permission for the extension
+        logger.warning("Invoice search index unavailable, using ILIKE: %s", exc)
+        return False
+
+    _indexed_dialect = dialect
+    return True
+
+
+def invoice_search_statements(dialect: str) -> List[str]:
+    """Statements that install the search index from scratch, for migrations emitting SQL offline"""
+    if dialect == "sqlite":
+        return _SQLITE_STATEMENTS + ["INSERT INTO invoice_search(invoice_search) VALUES ('rebuild')"]
+    if dialect == "postgresql":
+        return list(_POSTGRES_STATEMENTS)
+    return []
+
+
+def drop_invoice_search(connection: Connection) -> None:
+    """Drop the SQLite FTS table along with invoices (triggers and indexes go with the table)"""
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DROP TABLE IF EXISTS invoice_search"))
+
+
+def ensure_invoice_search(engine: Engine) -> bool:
+    """Install the search index on an existing database"""
+    with engine.begin() as connection:
+        return install_invoice_search(connection)
+
+
+@event.listens_for(Invoice.__table__, "after_create")
+def _create_with_invoices(target, connection, **kw):
+    install_invoice_search(connection)
+
+
+@event.listens_for(Invoice.__table__, "before_drop")
+def _drop_with_invoices(target, connection, **kw):
+    drop_invoice_search(connection)
+
+
+def search_document():
+    """Invoice number, supplier and notes as one string (the PostgreSQL index expression)"""
+    return (
+        literal_column("coalesce(invoices.invoice_number, '')", String)
+        + literal_column("' '", String) + Invoice.supplier_name + literal_column("' '", String)
+        + literal_column("coalesce(invoices.notes, '')", String)
+    )
+
+
+def invoice_search_filter(dialect_name: str, term: str):
+    """Filter matching invoices whose number, supplier or notes contain the term"""
+    if len(term) >= MIN_INDEXED_TERM_LENGTH and _indexed_dialect == dialect_name:
+        if dialect_name == "sqlite":
+            # Quoted as an FTS5 phrase; with trigrams that is a substring match
+            phrase = '"' + term.replace('"', '""') + '"'
+            matches = text(
+                "SELECT rowid FROM invoice_search WHERE invoice_search MATCH :phrase"
+            ).bindparams(phrase=phrase).columns(column("rowid", Integer))
+            return Invoice.id.in_(matches)
+        return search_document().ilike(f"%{term}%")
+
+    search_term = f"%{term}%"
+    return or_(
+        Invoice.invoice_number.ilike(search_term),
+        Invoice.supplier_name.ilike(search_term),
+        Invoice.notes.ilike(search_term)
+    )
@@ -1,13 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.db.database import engine, Base, SessionLocal
+from app.db.database import engine, async_engine, SessionLocal, get_pool_status
+from app.db.migrations import upgrade_database
 from app.api import auth, stations, fuel_types, invoices, sales, dashboard
-from app.models import User
+from app.models import User, Sale, Invoice, DailyStationFuelSummary
+from app.services.daily_summary import rebuild_daily_summary
+from app.services.pdf_extraction import shutdown_extraction_pool
 from scripts.seed_data import run_seed
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Create tables, or migrate a database created by an earlier version
+upgrade_database(engine)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -52,6 +55,29 @@ def auto_seed_demo_data():
         run_seed()
 
 
+@app.on_event("startup")
+def backfill_daily_summary():
+    """Build the daily rollup once for databases created before it existed"""
+    db = SessionLocal()
+    try:
+        has_summary = db.query(DailyStationFuelSummary.id).first() is not None
+        has_data = db.query(Sale.id).first() is not None or db.query(Invoice.id).first() is not None
+        if not has_summary and has_data:
+            rebuild_daily_summary(db)
+    finally:
+        db.close()
+
+
+@app.on_event("shutdown")
+def stop_extraction_workers():
+    shutdown_extraction_pool()
+
+
+@app.on_event("shutdown")
+async def close_async_connections():
+    await async_engine.dispose()
+
+
 @app.get("/")
 def root():
     return {
@@ -64,3 +90,9 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/health/db")
+def database_pool_status():
+    """Connection pool occupancy and checkout wait counters"""
+    return get_pool_status()
@@ -4,3 +4,6 @@ from .station import Station
 from .fuel_type import FuelType
 from .invoice import Invoice
 from .sale import Sale
+from .daily_summary import DailyStationFuelSummary
+from .pdf_blob import PdfBlob
+from .invoice_extraction import InvoiceExtraction
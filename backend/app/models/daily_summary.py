@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, Numeric, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class DailyStationFuelSummary(Base):
+    """Daily rollup of sales and invoices per station and fuel type"""
+    __tablename__ = "daily_station_fuel_summary"
+    __table_args__ = (
+        UniqueConstraint("station_id", "fuel_type_id", "summary_date", name="uq_daily_summary_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    station_id = Column(Integer, ForeignKey("stations.id"), nullable=False)
+    fuel_type_id = Column(Integer, ForeignKey("fuel_types.id"), nullable=False)
+    summary_date = Column(Date, nullable=False)
+    quantity_sold = Column(Numeric(14, 2), nullable=False, default=0)
+    sales_revenue = Column(Numeric(16, 2), nullable=False, default=0)
+    quantity_purchased = Column(Numeric(14, 2), nullable=False, default=0)
+    purchase_cost = Column(Numeric(16, 2), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -6,6 +6,9 @@ from app.db.database import Base
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_station_date_fuel", "station_id", "invoice_date", "fuel_type_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     invoice_number = Column(String(100), nullable=True)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, JSON
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class InvoiceExtraction(Base):
+    """Fields read from an invoice's PDF, proposed for confirmation"""
+    __tablename__ = "invoice_extractions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    invoice_id = Column(Integer, ForeignKey("invoices.id", ondelete="CASCADE"), unique=True, nullable=False)
+    pdf_file_path = Column(String(500), nullable=False)  # The PDF the proposal was read from
+    status = Column(String(20), nullable=False, default="pending")  # pending, completed, failed, confirmed
+    proposal = Column(JSON, nullable=True)
+    error = Column(String(500), nullable=True)
+    processing_seconds = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class PdfBlob(Base):
+    """Content-addressed invoice PDF shared by every invoice that references its file_path"""
+    __tablename__ = "pdf_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, nullable=False)
+    file_path = Column(String(500), unique=True, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # Invoices pointing at this blob
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
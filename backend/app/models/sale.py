@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -6,6 +6,10 @@ from app.db.database import Base
 
 class Sale(Base):
     __tablename__ = "sales"
+    __table_args__ = (
+        # Station + date range (+ fuel type) is the shape of every list, rollup and cost query
+        Index("ix_sales_station_date_fuel", "station_id", "sale_date", "fuel_type_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sale_date = Column(Date, nullable=False)
@@ -14,6 +18,9 @@ class Sale(Base):
     quantity_sold = Column(Numeric(12, 2), nullable=False)  # liters/gallons
     price_per_unit = Column(Numeric(10, 2), nullable=False)
     total_sales = Column(Numeric(14, 2), nullable=False)
+    cost_price = Column(Numeric(10, 4), nullable=True)  # Average invoice price up to sale_date
+    profit_margin = Column(Numeric(10, 4), nullable=True)  # price_per_unit - cost_price
+    total_profit = Column(Numeric(14, 2), nullable=True)  # profit_margin * quantity_sold
     notes = Column(String(500), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -13,7 +13,7 @@ class Station(Base):
     city = Column(String(100), nullable=True)
     state = Column(String(100), nullable=True)
     is_active = Column(Boolean, default=True)
-    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -2,6 +2,11 @@ from .user import UserCreate, UserLogin, UserResponse, Token
 from .organization import OrganizationCreate, OrganizationResponse
 from .station import StationCreate, StationUpdate, StationResponse
 from .fuel_type import FuelTypeCreate, FuelTypeResponse
-from .invoice import InvoiceCreate, InvoiceUpdate, InvoiceResponse
-from .sale import SaleCreate, SaleUpdate, SaleResponse
-from .dashboard import DashboardResponse, KPIData, ChartData, StationSalesData, SalesTrendData, FuelTypeData
+from .invoice import InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoicePage
+from .sale import SaleCreate, SaleUpdate, SaleResponse, SalePage
+from .dashboard import (
+    DashboardResponse, KPIData, ComparisonKPIData, ChartData, StationSalesData, SalesTrendData, FuelTypeData,
+    DashboardCacheMetrics
+)
+from .bulk import BulkRowError, BulkCreateResult, DuplicateInvoice, InvoiceImportResult
+from .extraction import ExtractionLine, ExtractionProposal, InvoiceExtractionResponse, ExtractionMetrics
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class BulkRowError(BaseModel):
+    row: int  # 1-based position in the submitted array or CSV data rows
+    error: str
+
+
+class BulkCreateResult(BaseModel):
+    created: int
+    errors: List[BulkRowError]
+
+
+class DuplicateInvoice(BaseModel):
+    row: int
+    invoice_number: str
+
+
+class InvoiceImportResult(BaseModel):
+    created: int
+    duplicate_count: int
+    error_count: int
+    duplicates: List[DuplicateInvoice]  # First MAX_REPORTED_ROWS only
+    errors: List[BulkRowError]  # First MAX_REPORTED_ROWS only
@@ -22,7 +22,7 @@ class StationSalesData(BaseModel):
 
 
 class SalesTrendData(BaseModel):
-    date: date
+    date: date  # Bucket start (clamped to the period start)
     total_sales: Decimal
     total_quantity: Decimal
 
@@ -38,8 +38,36 @@ class ChartData(BaseModel):
     station_comparison: List[StationSalesData]
     sales_trend: List[SalesTrendData]
     fuel_breakdown: List[FuelTypeData]
+    trend_granularity: str = "day"  # Bucket of each sales_trend point: day, week or month
+    comparison_trend: Optional[List[SalesTrendData]] = None  # Compared period, overlaid by position
+
+
+class ComparisonKPIData(BaseModel):
+    compare: str  # previous or yoy
+    today: date  # Day compared with today
+    month_start: date  # Days compared with this month
+    month_end: date
+    period_start: date  # Period of comparison_trend
+    period_end: date
+    total_sales_today: Decimal
+    total_sales_this_month: Decimal
+    total_fuel_purchased_this_month: Decimal
+    total_fuel_sold_this_month: Decimal
+    total_purchase_cost_this_month: Decimal
+    profit_this_month: Decimal
 
 
 class DashboardResponse(BaseModel):
     kpis: KPIData
     charts: ChartData
+    comparison: Optional[ComparisonKPIData] = None
+
+
+class DashboardCacheMetrics(BaseModel):
+    entries: int
+    hits: int
+    misses: int
+    coalesced: int  # Requests that waited for an identical in-flight build
+    in_flight: int
+    hit_rate: float
+    invalidations: int  # Entries dropped by sale, invoice and station writes
@@ -0,0 +1,44 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date, datetime
+from decimal import Decimal
+
+
+class ExtractionLine(BaseModel):
+    product: str
+    quantity: Decimal
+    price_per_unit: Decimal
+    fuel_type_id: Optional[int] = None  # None when the product matched no fuel type
+
+
+class ExtractionProposal(BaseModel):
+    invoice_number: Optional[str] = None
+    invoice_date: Optional[date] = None
+    terminal: Optional[str] = None
+    carrier: Optional[str] = None
+    page_count: Optional[int] = None
+    lines: List[ExtractionLine] = []
+
+
+class InvoiceExtractionResponse(BaseModel):
+    invoice_id: int
+    status: str  # pending, completed, failed, confirmed
+    proposal: Optional[ExtractionProposal] = None
+    error: Optional[str] = None
+    processing_seconds: Optional[float] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ExtractionMetrics(BaseModel):
+    workers: int
+    submitted: int
+    completed: int
+    failed: int
+    in_flight: int
+    pages: int
+    avg_seconds_per_pdf: float
+    pdfs_per_second: float  # Finished PDFs since the first submission in this process
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date, datetime
 from decimal import Decimal
 
@@ -44,3 +44,9 @@ class InvoiceResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class InvoicePage(BaseModel):
+    items: List[InvoiceResponse]
+    next_cursor: Optional[str] = None  # Pass as cursor to fetch the next page
+    total_count: Optional[int] = None  # Only set when include_total=true
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date, datetime
 from decimal import Decimal
 
@@ -40,3 +40,11 @@ class SaleResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class SalePage(BaseModel):
+    items: List[SaleResponse]
+    next_cursor: Optional[str] = None  # Pass as cursor to fetch the next page
+    total_count: Optional[int] = None  # Only set when include_total=true
+    total_sales: Optional[Decimal] = None  # Sum over every matching row, only set when include_total=true
+    total_profit: Optional[Decimal] = None
@@ -0,0 +1,161 @@
+"""
+Cost-basis index for sale profit calculations.
+
+The average cost price of a sale is the AVG of price_per_unit over all invoices for
+the same station and fuel type dated on or before the sale. Instead of running that
+AVG once per sale, the index loads the invoice prices in date order in a single query,
+keeps the running average at every invoice date and answers each sale with a binary
+search. The average is summed and divided in Decimal and rounded to the scale of
+Sale.cost_price, so it comes out the same whichever order the invoices were written in
+and whichever path (single sale, bulk, recompute) asks for it.
+
+Sales store the resulting cost price, profit margin and total profit. Invoice writes
+schedule recompute_sale_costs_job for the affected (station, fuel type) so only
+sales dated on or after the invoice are refreshed.
+"""
+from bisect import bisect_right
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.db.database import SessionLocal
+from app.models import Invoice, Sale
+
+COST_PRICE_EXPONENT = Decimal("0.0001")  # Scale of Sale.cost_price
+
+
+class CostBasisIndex:
+    """Running average invoice price per (station, fuel type), keyed by invoice date"""
+
+    def __init__(self, entries: Dict[Tuple[int, int], Tuple[List[date], List[Optional[Decimal]]]]):
+        self._entries = entries
+
+    @classmethod
+    def build(
+        cls,
+        db: Session,
+        station_ids: Iterable[int],
+        fuel_type_id: Optional[int] = None,
+        until: Optional[date] = None
+    ) -> "CostBasisIndex":
+        """Load the running averages for the given stations (and fuel type, up to a date) in one query"""
+        station_ids = list(station_ids)
+        entries: Dict[Tuple[int, int], Tuple[List[date], List[Optional[Decimal]]]] = {}
+        if not station_ids:
+            return cls(entries)
+
+        query = db.query(
+            Invoice.station_id,
+            Invoice.fuel_type_id,
+            Invoice.invoice_date,
+            Invoice.price_per_unit
+        ).filter(
+            Invoice.station_id.in_(station_ids)
+        )
+        if fuel_type_id is not None:
+            query = query.filter(Invoice.fuel_type_id == fuel_type_id)
+        if until is not None:
+            query = query.filter(Invoice.invoice_date <= until)
+
+        rows = query.order_by(Invoice.station_id, Invoice.fuel_type_id, Invoice.invoice_date).all()
+
+        total = Decimal(0)
+        count = 0
+        for station_id, fuel_type_id, invoice_date, price_per_unit in rows:
+            dates, averages = entries.setdefault((station_id, fuel_type_id), ([], []))
+            if not dates:
+                total, count = Decimal(0), 0
+            total += Decimal(str(price_per_unit))
+            count += 1
+            average = (total / count).quantize(COST_PRICE_EXPONENT, rounding=ROUND_HALF_UP)
+            # Every invoice on or before a date counts, so invoices sharing a date
+            # leave one entry holding the average after the last of them
+            if dates and dates[-1] == invoice_date:
+                averages[-1] = average or None
+            else:
+                dates.append(invoice_date)
+                averages.append(average or None)
+
+        return cls(entries)
+
+    def average_cost_price(self, station_id: int, fuel_type_id: int, sale_date: date) -> Optional[Decimal]:
+        """Average invoice price for this station and fuel type up to the sale date"""
+        entry = self._entries.get((station_id, fuel_type_id))
+        if entry is None:
+            return None
+
+        dates, averages = entry
+        position = bisect_right(dates, sale_date)
+        if position == 0:
+            return None
+        return averages[position - 1]
+
+
+def sale_profit_fields(price_per_unit: Decimal, quantity_sold: Decimal, cost_price: Optional[Decimal]) -> dict:
+    """Cost price, profit margin and total profit columns for a sale"""
+    if not cost_price:
+        return {"cost_price": None, "profit_margin": None, "total_profit": None}
+
+    profit_margin = Decimal(str(price_per_unit)) - cost_price
+    return {
+        "cost_price": cost_price,
+        "profit_margin": profit_margin,
+        "total_profit": profit_margin * Decimal(str(quantity_sold))
+    }
+
+
+def recompute_sale_costs(
+    db: Session,
+    station_ids: Iterable[int],
+    fuel_type_id: Optional[int] = None,
+    from_date: Optional[date] = None
+) -> int:
+    """
+    Refresh the stored cost and profit columns of the matching sales.
+    Commits and returns the number of sales updated.
+    """
+    station_ids = list(station_ids)
+    if not station_ids:
+        return 0
+
+    cost_index = CostBasisIndex.build(db, station_ids, fuel_type_id)
+
+    query = db.query(
+        Sale.id,
+        Sale.station_id,
+        Sale.fuel_type_id,
+        Sale.sale_date,
+        Sale.price_per_unit,
+        Sale.quantity_sold
+    ).filter(Sale.station_id.in_(station_ids))
+    if fuel_type_id is not None:
+        query = query.filter(Sale.fuel_type_id == fuel_type_id)
+    if from_date is not None:
+        query = query.filter(Sale.sale_date >= from_date)
+
+    updates = [
+        {
+            "id": sale_id,
+            **sale_profit_fields(
+                price_per_unit,
+                quantity_sold,
+                cost_index.average_cost_price(station_id, sale_fuel_type_id, sale_date)
+            )
+        }
+        for sale_id, station_id, sale_fuel_type_id, sale_date, price_per_unit, quantity_sold in query
+    ]
+
+    if updates:
+        db.execute(update(Sale), updates)
+    db.commit()
+    return len(updates)
+
+
+def recompute_sale_costs_job(station_id: int, fuel_type_id: int, from_date: date) -> None:
+    """Background task run after an invoice write for (station, fuel type)"""
+    db = SessionLocal()
+    try:
+        recompute_sale_costs(db, [station_id], fuel_type_id, from_date)
+    finally:
+        db.close()
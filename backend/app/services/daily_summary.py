@@ -0,0 +1,169 @@
+"""
+Maintenance of the daily_station_fuel_summary rollup.
+
+Sale and invoice handlers apply their contribution to the rollup in the same
+transaction as the write, so dashboard queries can read pre-aggregated rows
+instead of scanning the raw sales and invoices tables. Each change is also
+recorded for the dashboard cache, which drops the affected responses on commit.
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models import DailyStationFuelSummary, Sale, Invoice
+from app.services.dashboard_cache import record_dashboard_change
+
+SUMMARY_FIELDS = ("quantity_sold", "sales_revenue", "quantity_purchased", "purchase_cost")
+
+# INSERT constructs supporting ON CONFLICT DO UPDATE, by dialect
+_DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _upsert_deltas(db: Session, rows: List[Dict]) -> None:
+    """
+    Add each row's deltas to its rollup row, inserting it if the key is new.
+    INSERT ... ON CONFLICT DO UPDATE, so concurrent transactions writing the first
+    row for the same key both land instead of one failing on uq_daily_summary_key.
+    """
+    table = DailyStationFuelSummary.__table__
+    statement = _DIALECT_INSERTS[db.get_bind().dialect.name](table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.station_id, table.c.fuel_type_id, table.c.summary_date],
+        set_={
+            **{field: table.c[field] + statement.excluded[field] for field in SUMMARY_FIELDS},
+            "updated_at": func.now()
+        }
+    )
+    db.execute(statement, rows)
+
+
+def _apply_delta(db: Session, station_id: int, fuel_type_id: int, summary_date: date, **deltas: Decimal) -> None:
+    """Add deltas to the rollup row for (station, fuel type, date), creating it if needed"""
+    record_dashboard_change(db, station_id, summary_date)
+    values = {field: Decimal("0") for field in SUMMARY_FIELDS}
+    values.update(deltas)
+    _upsert_deltas(db, [{
+        "station_id": station_id,
+        "fuel_type_id": fuel_type_id,
+        "summary_date": summary_date,
+        **values
+    }])
+
+
+def apply_sale(db: Session, sale: Sale, sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) a sale's contribution to the rollup"""
+    _apply_delta(
+        db, sale.station_id, sale.fuel_type_id, sale.sale_date,
+        quantity_sold=sign * Decimal(str(sale.quantity_sold)),
+        sales_revenue=sign * Decimal(str(sale.total_sales))
+    )
+
+
+def apply_invoice(db: Session, invoice: Invoice, sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) an invoice's contribution to the rollup"""
+    _apply_delta(
+        db, invoice.station_id, invoice.fuel_type_id, invoice.invoice_date,
+        quantity_purchased=sign * Decimal(str(invoice.quantity)),
+        purchase_cost=sign * Decimal(str(invoice.total_amount))
+    )
+
+
+def apply_sales_bulk(db: Session, sales: Iterable[dict]) -> None:
+    """Add the contribution of many new sales (as column dicts) to the rollup"""
+    deltas: Dict[Tuple[int, int, date], Dict[str, Decimal]] = {}
+    for sale in sales:
+        key = (sale["station_id"], sale["fuel_type_id"], sale["sale_date"])
+        delta = deltas.setdefault(key, {field: Decimal("0") for field in SUMMARY_FIELDS})
+        delta["quantity_sold"] += Decimal(str(sale["quantity_sold"]))
+        delta["sales_revenue"] += Decimal(str(sale["total_sales"]))
+    _apply_deltas_bulk(db, deltas)
+
+
+def apply_invoices_bulk(db: Session, invoices: Iterable[dict]) -> None:
+    """Add the contribution of many new invoices (as column dicts) to the rollup"""
+    deltas: Dict[Tuple[int, int, date], Dict[str, Decimal]] = {}
+    for invoice in invoices:
+        key = (invoice["station_id"], invoice["fuel_type_id"], invoice["invoice_date"])
+        delta = deltas.setdefault(key, {field: Decimal("0") for field in SUMMARY_FIELDS})
+        delta["quantity_purchased"] += Decimal(str(invoice["quantity"]))
+        delta["purchase_cost"] += Decimal(str(invoice["total_amount"]))
+    _apply_deltas_bulk(db, deltas)
+
+
+def _apply_deltas_bulk(db: Session, deltas: Dict[Tuple[int, int, date], Dict[str, Decimal]]) -> None:
+    """Apply many rollup deltas with one executemany upsert"""
+    if not deltas:
+        return
+
+    for station_id, _, summary_date in deltas:
+        record_dashboard_change(db, station_id, summary_date)
+    _upsert_deltas(db, [
+        {"station_id": station_id, "fuel_type_id": fuel_type_id, "summary_date": summary_date, **delta}
+        for (station_id, fuel_type_id, summary_date), delta in deltas.items()
+    ])
+
+
+def rebuild_daily_summary(db: Session, station_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute the rollup from the raw sales and invoices tables.
+    Rebuilds every station when station_ids is None. Commits and returns the row count.
+    """
+    station_ids = list(station_ids) if station_ids is not None else None
+
+    delete_query = db.query(DailyStationFuelSummary)
+    sales_query = db.query(
+        Sale.station_id,
+        Sale.fuel_type_id,
+        Sale.sale_date,
+        func.coalesce(func.sum(Sale.quantity_sold), 0),
+        func.coalesce(func.sum(Sale.total_sales), 0)
+    )
+    invoices_query = db.query(
+        Invoice.station_id,
+        Invoice.fuel_type_id,
+        Invoice.invoice_date,
+        func.coalesce(func.sum(Invoice.quantity), 0),
+        func.coalesce(func.sum(Invoice.total_amount), 0)
+    )
+
+    if station_ids is not None:
+        delete_query = delete_query.filter(DailyStationFuelSummary.station_id.in_(station_ids))
+        sales_query = sales_query.filter(Sale.station_id.in_(station_ids))
+        invoices_query = invoices_query.filter(Invoice.station_id.in_(station_ids))
+
+    delete_query.delete(synchronize_session=False)
+    for station_id in station_ids if station_ids is not None else [None]:
+        record_dashboard_change(db, station_id)
+
+    rows: Dict[Tuple[int, int, date], Dict[str, Decimal]] = {}
+
+    def row_for(key):
+        if key not in rows:
+            rows[key] = {field: Decimal("0") for field in SUMMARY_FIELDS}
+        return rows[key]
+
+    sales_groups = sales_query.group_by(Sale.station_id, Sale.fuel_type_id, Sale.sale_date)
+    for station_id, fuel_type_id, sale_date, quantity, revenue in sales_groups:
+        row = row_for((station_id, fuel_type_id, sale_date))
+        row["quantity_sold"] = Decimal(str(quantity))
+        row["sales_revenue"] = Decimal(str(revenue))
+
+    invoice_groups = invoices_query.group_by(Invoice.station_id, Invoice.fuel_type_id, Invoice.invoice_date)
+    for station_id, fuel_type_id, invoice_date, quantity, cost in invoice_groups:
+        row = row_for((station_id, fuel_type_id, invoice_date))
+        row["quantity_purchased"] = Decimal(str(quantity))
+        row["purchase_cost"] = Decimal(str(cost))
+
+    if rows:
+        db.execute(
+            DailyStationFuelSummary.__table__.insert(),
+            [
+                {"station_id": s, "fuel_type_id": f, "summary_date": d, **values}
+                for (s, f, d), values in rows.items()
+            ]
+        )
+
+    db.commit()
+    return len(rows)
@@ -0,0 +1,225 @@
+"""
+In-process cache of dashboard responses.
+
+Managers keep the dashboard open and refresh it every minute, while sales and
+invoices arrive a few times a day, so responses are cached per (organization,
+station, period, comparison, day). Rollup writes record the station and date they
+touch on the session; when the transaction commits, only the cached dashboards
+covering that station and date (or comparing against it) are dropped. Station writes drop the organization's
+dashboards, and entries from earlier days are discarded at day rollover so
+"today" and "this month" move on. A TTL bounds staleness for writes made by
+other worker processes or by scripts.
+
+Identical requests that miss at the same time (a wall screen open in several
+browsers, a shift change) share a single build instead of each running the
+dashboard queries. Builds run on the event loop; invalidations come from the
+sync write routes in the threadpool, so the bookkeeping is guarded by a lock.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.schemas import DashboardResponse
+from app.services.dashboard_periods import comparison_periods
+
+# Session.info key for (station_id, date) pairs changed in the open transaction;
+# a None date means every date of the station, a None station every station
+CHANGES_KEY = "dashboard_changes"
+
+
+class DashboardKey(NamedTuple):
+    organization_id: int
+    station_id: Optional[int]
+    period_start: date
+    period_end: date
+    granularity: str
+    compare: Optional[str]
+    today: date
+
+
+def _covers(key: DashboardKey, station_ids: FrozenSet[int], station_id: Optional[int], changed: Optional[date]) -> bool:
+    """Whether the dashboard for key over station_ids depends on a (station_id, date) change"""
+    if station_id is not None and station_id not in station_ids:
+        return False
+    if changed is None:
+        return True
+    # Month KPIs sum every date from the 1st on; the trend covers the period
+    if changed >= key.today.replace(day=1) or key.period_start <= changed <= key.period_end:
+        return True
+    if key.compare is None:
+        return False
+    compared = comparison_periods(key.compare, key.today, key.period_start, key.period_end)
+    return (
+        changed == compared.today
+        or compared.month_start <= changed <= compared.month_end
+        or compared.period_start <= changed <= compared.period_end
+    )
+
+
+class _Entry(NamedTuple):
+    stored_at: float
+    response: DashboardResponse
+    station_ids: FrozenSet[int]
+
+
+class _Flight:
+    """A dashboard being built; identical requests wait for it instead of building their own"""
+
+    def __init__(self, station_ids: FrozenSet[int], generation: int):
+        self.station_ids = station_ids
+        self.generation = generation
+        self.done = asyncio.Event()
+        self.response: Optional[DashboardResponse] = None
+        self.error: Optional[BaseException] = None
+
+
+class _DashboardCache:
+    """
+    Thread-safe LRU of dashboard responses with TTL expiry and change-driven
+    invalidation. Concurrent misses for one key share a single build.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[DashboardKey, _Entry]" = OrderedDict()
+        self._in_flight: Dict[DashboardKey, _Flight] = {}
+        self._generation = 0
+        self._today: Optional[date] = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    async def get(
+        self,
+        key: DashboardKey,
+        station_ids: Iterable[int],
+        builder: Callable[[], Awaitable[DashboardResponse]]
+    ) -> DashboardResponse:
+        now = time.monotonic()
+        with self._lock:
+            if self._today != key.today:
+                # Day rollover: yesterday's "today" and month figures are no longer wanted
+                self._entries.clear()
+                self._today = key.today
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.stored_at < settings.DASHBOARD_CACHE_SECONDS:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.response
+
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = _Flight(frozenset(station_ids), self._generation)
+                self._in_flight[key] = flight
+            else:
+                self.coalesced += 1
+
+        if leader:
+            return await self._build(key, flight, builder, now)
+
+        # Another request is building this dashboard; share its result
+        await flight.done.wait()
+        if isinstance(flight.error, asyncio.CancelledError):
+            return await self.get(key, station_ids, builder)  # The builder was cancelled, not failed
+        if flight.error is not None:
+            raise flight.error
+        return flight.response
+
+    async def _build(
+        self,
+        key: DashboardKey,
+        flight: _Flight,
+        builder: Callable[[], Awaitable[DashboardResponse]],
+        now: float
+    ) -> DashboardResponse:
+        try:
+            flight.response = await builder()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is flight:
+                    del self._in_flight[key]
+                # Don't store a response built while a write was being committed
+                if flight.error is None and flight.generation == self._generation and self._today == key.today:
+                    self._entries[key] = _Entry(now, flight.response, flight.station_ids)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > settings.DASHBOARD_CACHE_MAX_ENTRIES:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.response
+
+    def _drop(self, is_stale: Callable[[DashboardKey, FrozenSet[int]], bool]) -> None:
+        # Called holding the lock
+        self._generation += 1
+        stale = [key for key, entry in self._entries.items() if is_stale(key, entry.station_ids)]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        # Later requests must not join builds that may have read the old data
+        for key in [key for key, flight in self._in_flight.items() if is_stale(key, flight.station_ids)]:
+            del self._in_flight[key]
+
+    def invalidate(self, changes: Iterable[Tuple[Optional[int], Optional[date]]]) -> None:
+        """Drop entries covering any of the (station_id, date) changes"""
+        changes = list(changes)
+        with self._lock:
+            self._drop(lambda key, station_ids: any(
+                _covers(key, station_ids, station_id, changed) for station_id, changed in changes
+            ))
+
+    def invalidate_organization(self, organization_id: int) -> None:
+        with self._lock:
+            self._drop(lambda key, station_ids: key.organization_id == organization_id)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+dashboard_cache = _DashboardCache()
+
+
+def record_dashboard_change(db: Session, station_id: Optional[int], changed: Optional[date] = None) -> None:
+    """Note a rollup change; matching dashboards are dropped once the session commits"""
+    changes: Set[Tuple[Optional[int], Optional[date]]] = db.info.setdefault(CHANGES_KEY, set())
+    changes.add((station_id, changed))
+
+
+def invalidate_organization_dashboards(organization_id: int) -> None:
+    """Drop an organization's cached dashboards after a station write"""
+    dashboard_cache.invalidate_organization(organization_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_changes(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # Released savepoint; wait for the outer commit
+    changes = session.info.pop(CHANGES_KEY, None)
+    if changes:
+        dashboard_cache.invalidate(changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_changes(session: Session, previous_transaction) -> None:
+    # Savepoint rollbacks keep the changes made earlier in the outer transaction
+    if previous_transaction.parent is None:
+        session.info.pop(CHANGES_KEY, None)
@@ -0,0 +1,51 @@
+"""
+Date ranges that dashboard comparisons (compare=previous|yoy) are measured against.
+
+previous: yesterday, the same days of last month, and the trend period shifted
+back by its own length. yoy: the same dates one year earlier.
+"""
+from datetime import date, timedelta
+from typing import NamedTuple
+
+PREVIOUS = "previous"
+YEAR_OVER_YEAR = "yoy"
+
+
+class ComparisonPeriods(NamedTuple):
+    today: date  # Compared with today
+    month_start: date  # Compared with this month to date
+    month_end: date
+    period_start: date  # Compared with the trend period
+    period_end: date
+
+
+def shift_years(day: date, years: int) -> date:
+    """Same date `years` years away; Feb 29 falls back to Feb 28"""
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        return day.replace(year=day.year + years, day=28)
+
+
+def comparison_periods(compare: str, today: date, period_start: date, period_end: date) -> ComparisonPeriods:
+    start_of_month = today.replace(day=1)
+    if compare == YEAR_OVER_YEAR:
+        return ComparisonPeriods(
+            today=shift_years(today, -1),
+            month_start=shift_years(start_of_month, -1),
+            month_end=shift_years(today, -1),
+            period_start=shift_years(period_start, -1),
+            period_end=shift_years(period_end, -1),
+        )
+
+    # Previous month, up to the same day of the month (or its last day)
+    previous_month_end = start_of_month - timedelta(days=1)
+    previous_month_start = previous_month_end.replace(day=1)
+    period_length = (period_end - period_start).days + 1
+    return ComparisonPeriods(
+        today=today - timedelta(days=1),
+        month_start=previous_month_start,
+        month_end=min(previous_month_start + (today - start_of_month), previous_month_end),
+        period_start=period_start - timedelta(days=period_length),
+        period_end=period_end - timedelta(days=period_length),
+    )
@@ -0,0 +1,90 @@
+"""
+In-process cache of station and fuel-type names used by the response builders.
+
+Station names are cached per organization and invalidated by the station
+create, update and delete handlers. A TTL bounds staleness for writes made
+by other worker processes or by scripts.
+"""
+import threading
+import time
+from typing import Callable, Dict, Tuple
+from sqlalchemy.orm import Session
+from app.models import Station, FuelType
+
+CACHE_TTL_SECONDS = 300
+
+
+class _NameCache:
+    """Thread-safe id -> name maps keyed by scope, with TTL expiry"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[object, Tuple[float, Dict[int, str]]] = {}
+        self._generations: Dict[object, int] = {}
+
+    def get(self, key, loader: Callable[[], Dict[int, str]]) -> Dict[int, str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < CACHE_TTL_SECONDS:
+                return entry[1]
+            generation = self._generations.get(key, 0)
+
+        names = loader()
+        with self._lock:
+            # Don't store names loaded before a concurrent invalidation
+            if self._generations.get(key, 0) == generation:
+                self._entries[key] = (now, names)
+        return names
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+
+_station_names = _NameCache()
+_fuel_type_names = _NameCache()
+
+
+class DimensionNames:
+    """Station and fuel-type name lookups for one organization"""
+
+    def __init__(self, stations: Dict[int, str], fuel_types: Dict[int, str]):
+        self.stations = stations
+        self.fuel_types = fuel_types
+
+    def station_name(self, station_id: int) -> str:
+        return self.stations.get(station_id, "Unknown")
+
+    def fuel_type_name(self, fuel_type_id: int) -> str:
+        return self.fuel_types.get(fuel_type_id, "Unknown")
+
+
+def get_station_names(db: Session, organization_id: int) -> Dict[int, str]:
+    """Station id -> name for an organization"""
+    return _station_names.get(organization_id, lambda: {
+        station_id: name
+        for station_id, name in db.query(Station.id, Station.name).filter(
+            Station.organization_id == organization_id
+        ).all()
+    })
+
+
+def get_fuel_type_names(db: Session) -> Dict[int, str]:
+    """Fuel type id -> name (fuel types are shared by all organizations)"""
+    return _fuel_type_names.get("all", lambda: {
+        fuel_type_id: name
+        for fuel_type_id, name in db.query(FuelType.id, FuelType.name).all()
+    })
+
+
+def get_dimension_names(db: Session, organization_id: int) -> DimensionNames:
+    """Name lookups for building responses in an organization"""
+    return DimensionNames(get_station_names(db, organization_id), get_fuel_type_names(db))
+
+
+def invalidate_stations(organization_id: int) -> None:
+    """Drop an organization's cached station names after a station write"""
+    _station_names.invalidate(organization_id)
+
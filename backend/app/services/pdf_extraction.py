@@ -0,0 +1,202 @@
+"""
+Background extraction of invoice fields from uploaded PDFs.
+
+Parsing PDFs is CPU-bound, so it runs in a process pool (one worker per CPU
+unless PDF_EXTRACTION_WORKERS is set) instead of on the request path or the
+server's threadpool. An upload records a pending InvoiceExtraction; when the
+worker finishes, its fields are stored as the proposal, provided the invoice
+still has the same PDF. Uploads queue one job per invoice; the extraction script
+parses a stored PDF once for all the invoices sharing it.
+"""
+import logging
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models import Invoice, InvoiceExtraction
+from app.services.dimension_cache import get_fuel_type_names
+from app.services.pdf_text import extract_invoice_fields
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_CONFIRMED = "confirmed"
+
+# Product abbreviations on supplier invoices, spelled out for fuel-type matching
+PRODUCT_SYNONYMS = {
+    "ulsd": "ultra low sulfur diesel",
+    "reg": "regular",
+    "prem": "premium",
+    "mid": "midgrade",
+}
+
+
+class _ExtractionMetrics:
+    """Process-wide extraction counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.pages = 0
+        self.worker_seconds = 0.0
+        self._first_submit: Optional[float] = None
+
+    def record_submit(self) -> None:
+        with self._lock:
+            self.submitted += 1
+            if self._first_submit is None:
+                self._first_submit = time.monotonic()
+
+    def record_result(self, seconds: Optional[float], pages: int, failed: bool) -> None:
+        with self._lock:
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+                self.pages += pages
+                self.worker_seconds += seconds or 0.0
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            elapsed = time.monotonic() - self._first_submit if self._first_submit else 0.0
+            finished = self.completed + self.failed
+            return {
+                "workers": _worker_count(),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": self.submitted - finished,
+                "pages": self.pages,
+                "avg_seconds_per_pdf": self.worker_seconds / self.completed if self.completed else 0.0,
+                "pdfs_per_second": finished / elapsed if elapsed else 0.0,
+            }
+
+
+metrics = _ExtractionMetrics()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _worker_count() -> int:
+    return settings.PDF_EXTRACTION_WORKERS or multiprocessing.cpu_count()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers don't inherit the server's threads or database connections
+            _pool = ProcessPoolExecutor(
+                max_workers=_worker_count(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_extraction_pool(wait: bool = False) -> None:
+    """Stop the workers; wait=True lets queued PDFs and their result writes finish"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=not wait)
+            _pool = None
+
+
+def _product_words(text: str) -> set:
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return set(" ".join(PRODUCT_SYNONYMS.get(word, word) for word in words).split())
+
+
+def match_fuel_type(product: str, fuel_type_names: Dict[int, str]) -> Optional[int]:
+    """Fuel type sharing the most words with a product description (None if unclear)"""
+    product_words = _product_words(product)
+    scores = sorted(
+        ((len(product_words & _product_words(name)), fuel_type_id) for fuel_type_id, name in fuel_type_names.items()),
+        reverse=True
+    )
+    if not scores or scores[0][0] == 0 or (len(scores) > 1 and scores[1][0] == scores[0][0]):
+        return None
+    return scores[0][1]
+
+
+def queue_extraction(db: Session, invoice: Invoice) -> InvoiceExtraction:
+    """Reset the invoice's extraction to pending for its current PDF (caller commits)"""
+    extraction = db.query(InvoiceExtraction).filter(InvoiceExtraction.invoice_id == invoice.id).first()
+    if extraction is None:
+        extraction = InvoiceExtraction(invoice_id=invoice.id)
+        db.add(extraction)
+    extraction.pdf_file_path = invoice.pdf_file_path
+    extraction.status = STATUS_PENDING
+    extraction.proposal = None
+    extraction.error = None
+    extraction.processing_seconds = None
+    extraction.completed_at = None
+    return extraction
+
+
+def submit_extraction(extraction_ids: List[int], file_path: str) -> Future:
+    """Parse a PDF in the pool and store the result on each of the given extractions"""
+    metrics.record_submit()
+    future = _get_pool().submit(extract_invoice_fields, file_path)
+    future.add_done_callback(partial(_store_result, extraction_ids, file_path))
+    return future
+
+
+def _store_result(extraction_ids: List[int], file_path: str, future: Future) -> None:
+    if future.cancelled():
+        return  # Pool shut down; the extraction stays pending
+
+    error = None
+    fields = None
+    try:
+        fields = future.result()
+    except Exception as exc:
+        error = str(exc)[:500] or type(exc).__name__
+    metrics.record_result(fields and fields["seconds"], fields["page_count"] if fields else 0, failed=error is not None)
+
+    db = SessionLocal()
+    try:
+        proposal = None
+        if fields is not None:
+            fuel_type_names = get_fuel_type_names(db)
+            proposal = {
+                "invoice_number": fields["invoice_number"],
+                "invoice_date": fields["invoice_date"],
+                "terminal": fields["terminal"],
+                "carrier": fields["carrier"],
+                "page_count": fields["page_count"],
+                "lines": [
+                    {**line, "fuel_type_id": match_fuel_type(line["product"], fuel_type_names)}
+                    for line in fields["lines"]
+                ],
+            }
+
+        # Skip extractions whose invoice got another PDF in the meantime
+        extractions = db.query(InvoiceExtraction).filter(
+            InvoiceExtraction.id.in_(extraction_ids),
+            InvoiceExtraction.pdf_file_path == file_path,
+            InvoiceExtraction.status == STATUS_PENDING
+        ).all()
+        for extraction in extractions:
+            extraction.status = STATUS_FAILED if error else STATUS_COMPLETED
+            extraction.error = error
+            extraction.proposal = proposal
+            extraction.processing_seconds = fields["seconds"] if fields else None
+            extraction.completed_at = func.now()
+        db.commit()
+    except Exception:
+        logger.exception("Storing PDF extraction for %s failed", file_path)
+    finally:
+        db.close()
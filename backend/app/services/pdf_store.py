@@ -0,0 +1,148 @@
+"""
+Content-addressed store for invoice PDFs.
+
+Each distinct file is stored once under UPLOAD_DIR/<aa>/<bb>/<sha256>.pdf
+(the first two byte pairs of the hash shard the directories) and tracked by
+a PdfBlob row whose ref_count is the number of invoices pointing at it.
+Reference changes are made in the caller's transaction. A blob whose last
+reference is dropped keeps its row at ref_count 0 until collect_pdf_file()
+deletes the row and the file together, so an upload taking a new reference
+either gets in first (and the file stays) or waits for the delete to commit
+(and stores the file again).
+
+Files uploaded before the store existed ({invoice_id}_{uuid}.pdf) have no
+PdfBlob row and are deleted as soon as their invoice releases them.
+"""
+import os
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.db.database import SessionLocal
+from app.models import PdfBlob
+
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads", "invoices")
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(UPLOAD_DIR, sha256[:2], sha256[2:4], f"{sha256}.pdf")
+
+
+def pdf_etag(file_path: str) -> Optional[str]:
+    """Strong ETag for a stored blob (its content hash); None for pre-store uploads"""
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    if len(name) == 64 and all(c in "0123456789abcdef" for c in name):
+        return f'"{name}"'
+    return None
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _move_into_place(tmp_path: str, path: str) -> None:
+    while True:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.replace(tmp_path, path)
+            return
+        except FileNotFoundError:
+            if not os.path.exists(tmp_path):
+                raise
+            # collect_pdf_file removed the shard directory as it emptied; create it again
+
+
+def add_pdf_reference(db: Session, tmp_path: str, sha256: str, size: int) -> PdfBlob:
+    """
+    Take one reference to the blob for `sha256`, moving the uploaded temp file
+    into place if the blob has no file yet, otherwise discarding it.
+    """
+    path = blob_path(sha256)
+
+    incremented = db.query(PdfBlob).filter(PdfBlob.sha256 == sha256).update(
+        {PdfBlob.ref_count: PdfBlob.ref_count + 1}, synchronize_session=False
+    )
+    if not incremented:
+        try:
+            with db.begin_nested():
+                db.add(PdfBlob(sha256=sha256, file_path=path, size_bytes=size, ref_count=1))
+        except IntegrityError:
+            # Same file stored concurrently by another upload
+            db.query(PdfBlob).filter(PdfBlob.sha256 == sha256).update(
+                {PdfBlob.ref_count: PdfBlob.ref_count + 1}, synchronize_session=False
+            )
+
+    if os.path.exists(path):
+        _remove_file(tmp_path)
+    else:
+        _move_into_place(tmp_path, path)
+
+    return db.query(PdfBlob).filter(PdfBlob.sha256 == sha256).one()
+
+
+def retain_pdf_reference(db: Session, file_path: Optional[str]) -> bool:
+    """Take another reference to a stored PDF; False for pre-store uploads, which can't be shared"""
+    if not file_path:
+        return False
+    return bool(db.query(PdfBlob).filter(PdfBlob.file_path == file_path).update(
+        {PdfBlob.ref_count: PdfBlob.ref_count + 1}, synchronize_session=False
+    ))
+
+
+def release_pdf_reference(db: Session, file_path: Optional[str]) -> Optional[str]:
+    """
+    Drop one invoice's reference to a stored PDF. Returns the file path if it
+    is now unreferenced; pass it to collect_pdf_file() after committing.
+    """
+    if not file_path:
+        return None
+
+    released = db.query(PdfBlob).filter(PdfBlob.file_path == file_path).update(
+        {PdfBlob.ref_count: PdfBlob.ref_count - 1}, synchronize_session=False
+    )
+    if not released:
+        # Pre-store upload, owned by a single invoice
+        return file_path
+
+    unreferenced = db.query(PdfBlob.id).filter(
+        PdfBlob.file_path == file_path,
+        PdfBlob.ref_count <= 0
+    ).first()
+    return file_path if unreferenced else None
+
+
+def _remove_empty_shards(file_path: str) -> None:
+    """Remove the <aa>/<bb> directories above a deleted blob once nothing else is in them"""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    root = os.path.abspath(UPLOAD_DIR)
+    while directory.startswith(root + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return  # Not empty (or already gone, or a concurrent upload just created it)
+        directory = os.path.dirname(directory)
+
+
+def collect_pdf_file(file_path: str) -> None:
+    """Delete a released PDF unless it has been referenced again since (background task)"""
+    if pdf_etag(file_path) is None:
+        _remove_file(file_path)  # Pre-store upload, owned by the invoice that released it
+        return
+
+    db = SessionLocal()
+    try:
+        # The delete locks the row until the commit: add_pdf_reference's increment
+        # either ran first (ref_count > 0, nothing deleted) or waits and finds no row
+        unreferenced = db.query(PdfBlob).filter(
+            PdfBlob.file_path == file_path,
+            PdfBlob.ref_count <= 0
+        ).delete(synchronize_session=False)
+        if unreferenced:
+            _remove_file(file_path)
+            _remove_empty_shards(file_path)
+        db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,112 @@
+"""
+Field extraction from supplier invoice PDFs (P & J Fuel layout).
+
+Runs inside extraction worker processes, so it only depends on the standard
+library and pypdf; results are plain dicts that pickle cheaply.
+"""
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+INVOICE_NUMBER_PATTERN = re.compile(r"INVOICE\s*(?:NO\.?|NUMBER|#)?\s*[:#]?\s*([A-Z0-9-]*\d[A-Z0-9-]*)", re.IGNORECASE)
+DATE_PATTERN = re.compile(r"(?:INVOICE\s+)?DATE\s*[:]?\s*(\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2})", re.IGNORECASE)
+ANY_DATE_PATTERN = re.compile(r"\b(\d{1,2}/\d{1,2}/\d{2,4})\b")
+TERMINAL_PATTERN = re.compile(r"TERMINAL\s*[:]?\s*([A-Z][A-Z .&'-]*[A-Z.])", re.IGNORECASE)
+CARRIER_PATTERN = re.compile(r"CARRIER\s*[:]?\s*([A-Z][A-Z .&'-]*[A-Z.])", re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r"(?<![\w.])\$?(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)(?![\w])")
+
+# Words identifying a product line; matched to fuel types when the proposal is stored
+PRODUCT_WORDS = ("UNLEADED", "REGULAR", "PREMIUM", "MIDGRADE", "PLUS", "DIESEL", "ULSD", "KEROSENE", "E85")
+
+# Labels whose values run up to the next label on the same line
+LABEL_STOP = re.compile(r"\s{2,}|\s+(?:CARRIER|TERMINAL|DATE|INVOICE|BOL|PO)\b", re.IGNORECASE)
+
+
+def _label_value(pattern: re.Pattern, text: str) -> Optional[str]:
+    match = pattern.search(text)
+    if not match:
+        return None
+    value = LABEL_STOP.split(match.group(1))[0].strip()
+    return value or None
+
+
+def _parse_date(value: str) -> Optional[str]:
+    for fmt in ("%m/%d/%Y", "%m/%d/%y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_product_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Product name, quantity and unit price from a line such as
+    '87 OCT. REGULAR UNLEADED   7,502 GAL   3.3310   24,989.16'
+    """
+    upper = line.upper()
+    if not any(word in upper for word in PRODUCT_WORDS):
+        return None
+
+    # Numbers after the last product word are quantity and price ("87 OCT." is part of the name)
+    name_end = max(upper.rfind(word) + len(word) for word in PRODUCT_WORDS if word in upper)
+    quantity = price = None
+    for match in NUMBER_PATTERN.finditer(line, name_end):
+        raw = match.group(1)
+        value = float(raw.replace(",", ""))
+        decimals = len(raw.split(".")[1]) if "." in raw else 0
+        if price is None and decimals >= 3 and 0 < value < 50:
+            price = raw.replace(",", "")
+        elif quantity is None and value >= 50 and decimals <= 2:
+            quantity = raw.replace(",", "")
+    if quantity is None or price is None:
+        return None
+
+    product = line[:name_end].strip(" :-")
+    return {"product": product, "quantity": quantity, "price_per_unit": price}
+
+
+def parse_invoice_text(text: str) -> Dict[str, Any]:
+    """Proposed invoice fields from the text of a supplier invoice"""
+    invoice_date = None
+    date_match = DATE_PATTERN.search(text) or ANY_DATE_PATTERN.search(text)
+    if date_match:
+        invoice_date = _parse_date(date_match.group(1))
+
+    invoice_number = None
+    for match in INVOICE_NUMBER_PATTERN.finditer(text):
+        # Skip "INVOICE DATE 10/01/2026" style matches
+        if "/" not in match.group(1):
+            invoice_number = match.group(1)
+            break
+
+    lines: List[Dict[str, Any]] = []
+    for line in text.splitlines():
+        parsed = _parse_product_line(line)
+        if parsed:
+            lines.append(parsed)
+
+    return {
+        "invoice_number": invoice_number,
+        "invoice_date": invoice_date,
+        "terminal": _label_value(TERMINAL_PATTERN, text),
+        "carrier": _label_value(CARRIER_PATTERN, text),
+        "lines": lines,
+    }
+
+
+def extract_invoice_fields(file_path: str) -> Dict[str, Any]:
+    """Read a PDF and parse its fields (worker process entry point)"""
+    started = time.perf_counter()
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("PDF extraction requires pypdf (pip install pypdf)")
+
+    reader = PdfReader(file_path)
+    text = "\n".join(page.extract_text() or "" for page in reader.pages)
+    fields = parse_invoice_text(text)
+    fields["page_count"] = len(reader.pages)
+    fields["seconds"] = time.perf_counter() - started
+    return fields
@@ -0,0 +1,44 @@
+"""
+Organization scoping for station-owned rows (sales, invoices, rollups).
+
+Row filters are a subquery on stations.organization_id, so the database
+resolves an organization's stations inside the same statement instead of
+the handler fetching them first and sending back an IN list.
+
+Single-station ownership checks use the organization's cached station set,
+which shares the station-name cache and its invalidation by the station
+handlers. A miss is confirmed against the database, so stations created by
+another worker are accepted before the cache expires.
+"""
+from typing import FrozenSet
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models import Station
+from app.services.dimension_cache import get_station_names, invalidate_stations
+
+
+def org_station_ids(db: Session, organization_id: int) -> FrozenSet[int]:
+    """Cached set of station IDs belonging to an organization"""
+    return frozenset(get_station_names(db, organization_id))
+
+
+def org_station_filter(station_id_column, organization_id: int):
+    """Filter restricting a station_id column to an organization's stations"""
+    return station_id_column.in_(
+        select(Station.id).where(Station.organization_id == organization_id)
+    )
+
+
+def owns_station(db: Session, organization_id: int, station_id: int) -> bool:
+    """Whether a station belongs to an organization"""
+    if station_id in org_station_ids(db, organization_id):
+        return True
+
+    exists = db.query(Station.id).filter(
+        Station.id == station_id,
+        Station.organization_id == organization_id
+    ).first() is not None
+    if exists:
+        # Created elsewhere since the cache was loaded
+        invalidate_stations(organization_id)
+    return exists
@@ -0,0 +1,112 @@
+"""
+In-process cache of user account status (active flag and role).
+
+Tokens carry the user's organization, so authenticating a request only needs
+to know that the account has not been disabled and what its role is now.
+Statuses are cached for USER_STATUS_CACHE_SECONDS. ORM changes to a user's
+is_active or is_admin drop the cached status when the session commits, so they
+take effect at once in this process and within that window on other workers.
+"""
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import User
+
+# Session.info key for ids of users whose status changed in the open transaction
+CHANGES_KEY = "user_status_changes"
+STATUS_COLUMNS = ("is_active", "is_admin")
+
+# Entries kept before the first sweep of expired ones
+MIN_SWEEP_SIZE = 1024
+
+
+class UserStatus(NamedTuple):
+    is_active: bool
+    is_admin: bool
+
+
+class _UserStatusCache:
+    """Thread-safe user id -> UserStatus map with TTL expiry"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[float, UserStatus]] = {}
+        self._sweep_at = MIN_SWEEP_SIZE
+
+    def get(self, user_id: int) -> Optional[UserStatus]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is None or time.monotonic() - entry[0] >= settings.USER_STATUS_CACHE_SECONDS:
+            return None
+        return entry[1]
+
+    def set(self, user_id: int, user_status: UserStatus) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[user_id] = (now, user_status)
+            if len(self._entries) >= self._sweep_at:
+                # Drop expired entries; sweeping again only after the map doubles keeps this amortized O(1)
+                expired = [
+                    key for key, (stored_at, _) in self._entries.items()
+                    if now - stored_at >= settings.USER_STATUS_CACHE_SECONDS
+                ]
+                for key in expired:
+                    del self._entries[key]
+                self._sweep_at = max(2 * len(self._entries), MIN_SWEEP_SIZE)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+_user_status = _UserStatusCache()
+
+
+def get_user_status(db: Session, user_id: int) -> Optional[UserStatus]:
+    """Whether a user is active and an admin (None if the user doesn't exist)"""
+    user_status = _user_status.get(user_id)
+    if user_status is not None:
+        return user_status
+
+    row = db.query(User.is_active, User.is_admin).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    user_status = UserStatus(is_active=bool(row.is_active), is_admin=bool(row.is_admin))
+    _user_status.set(user_id, user_status)
+    return user_status
+
+
+def invalidate_user_status(user_id: int) -> None:
+    """Drop a user's cached status (done on commit for ORM changes)"""
+    _user_status.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_status_changes(session: Session, flush_context) -> None:
+    # History is still available here; it is reset once the flush completes
+    changed = {user.id for user in session.deleted if isinstance(user, User)} | {
+        user.id for user in session.dirty
+        if isinstance(user, User) and any(
+            inspect(user).attrs[column].history.has_changes() for column in STATUS_COLUMNS
+        )
+    }
+    if changed:
+        changes: Set[int] = session.info.setdefault(CHANGES_KEY, set())
+        changes.update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_changes(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # Released savepoint; wait for the outer commit
+    for user_id in session.info.pop(CHANGES_KEY, ()):
+        invalidate_user_status(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_changes(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(CHANGES_KEY, None)
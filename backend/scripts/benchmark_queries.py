@@ -0,0 +1,219 @@
+"""
+Benchmark the dashboard and list queries with and without the hot-query indexes.
+
+Builds a scratch database of synthetic sales and invoices (a temporary SQLite
+file unless --database-url points at an empty database), times each query with
+the indexes from the 0001 migration dropped, then recreates them and times the
+queries again. Only those indexes are toggled; the later migrations' tables and
+columns stay in place. The app's own database is never touched.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import importlib.util
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+from app.db.database import Base, async_database_url
+from app.models import Organization, Station, FuelType, Sale, Invoice, User
+from app.api.dashboard import get_dashboard
+from app.api.sales import get_sales, get_average_cost_price
+from app.api.invoices import get_invoices
+from app.services.daily_summary import rebuild_daily_summary
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_MIGRATION = os.path.join(BACKEND_DIR, "alembic", "versions", "20261016_0001_hot_query_indexes.py")
+BATCH_SIZE = 5000
+
+
+def populate(db, organizations: int, stations_per_org: int, days: int) -> int:
+    """Insert synthetic organizations, stations and a row per station/fuel/day; returns the sale count"""
+    rng = random.Random(42)
+    db.execute(insert(FuelType), [
+        {"name": "87 OCT. REGULAR UNLEADED", "unit": "gallons"},
+        {"name": "93 OCT. PREMIUM UNLEADED", "unit": "gallons"},
+        {"name": "ULTRA LOW SULFUR DIESEL", "unit": "gallons"},
+    ])
+    db.execute(insert(Organization), [
+        {"name": f"Benchmark Org {n}", "email": f"bench{n}@example.com"} for n in range(organizations)
+    ])
+    org_ids = [row.id for row in db.query(Organization.id).order_by(Organization.id)]
+    db.execute(insert(Station), [
+        {"name": f"Station {org_id}-{n}", "location": "Benchmark", "organization_id": org_id}
+        for org_id in org_ids for n in range(stations_per_org)
+    ])
+    station_ids = [row.id for row in db.query(Station.id).order_by(Station.id)]
+    fuel_type_ids = [row.id for row in db.query(FuelType.id).order_by(FuelType.id)]
+
+    first_day = date.today() - timedelta(days=days - 1)
+    sales, invoices, sale_count = [], [], 0
+    # Date-major order, like rows arriving day by day
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        for station_id in station_ids:
+            for fuel_type_id in fuel_type_ids:
+                quantity = Decimal(rng.randint(200, 2000))
+                price = Decimal("3.50") + Decimal(rng.randint(0, 80)) / 100
+                sales.append({
+                    "sale_date": day, "station_id": station_id, "fuel_type_id": fuel_type_id,
+                    "quantity_sold": quantity, "price_per_unit": price, "total_sales": quantity * price,
+                })
+                if offset % 4 == 0:
+                    cost = price - Decimal("0.40")
+                    invoices.append({
+                        "invoice_number": f"B{station_id}-{fuel_type_id}-{offset}", "invoice_date": day,
+                        "supplier_name": "P & J Fuel Inc", "station_id": station_id,
+                        "fuel_type_id": fuel_type_id, "quantity": quantity * 4,
+                        "price_per_unit": cost, "total_amount": quantity * 4 * cost,
+                    })
+        if len(sales) >= BATCH_SIZE:
+            sale_count += len(sales)
+            db.execute(insert(Sale), sales)
+            sales = []
+        if len(invoices) >= BATCH_SIZE:
+            db.execute(insert(Invoice), invoices)
+            invoices = []
+    if sales:
+        sale_count += len(sales)
+        db.execute(insert(Sale), sales)
+    if invoices:
+        db.execute(insert(Invoice), invoices)
+    db.commit()
+    return sale_count
+
+
+def median_ms(func, repeat: int) -> float:
+    func()  # Warm caches
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run_queries(db, AsyncBenchSession, repeat: int) -> dict:
+    """Median milliseconds per query shape for a mid-sized organization"""
+    station = db.query(Station).order_by(Station.id).offset(db.query(Station).count() // 2).first()
+    user = User(id=0, organization_id=station.organization_id, is_admin=False, is_active=True)
+    fuel_type_id = db.query(FuelType.id).order_by(FuelType.id).first().id
+    month_ago = date.today() - timedelta(days=30)
+    list_args = dict(cursor=None, limit=100, include_total=False, db=db, current_user=user)
+    loop = asyncio.new_event_loop()
+    async_db = AsyncBenchSession()
+
+    queries = {
+        "dashboard (org, 30 days)": lambda: loop.run_until_complete(get_dashboard(
+            station_id=None, days=30, start_date=None, end_date=None, granularity="day", compare=None,
+            db=async_db, current_user=user)),
+        "dashboard (org, 30 days, yoy)": lambda: loop.run_until_complete(get_dashboard(
+            station_id=None, days=30, start_date=None, end_date=None, granularity="day", compare="yoy",
+            db=async_db, current_user=user)),
+        "dashboard (station, 90 days)": lambda: loop.run_until_complete(get_dashboard(
+            station_id=station.id, days=90, start_date=None, end_date=None, granularity="day", compare=None,
+            db=async_db, current_user=user)),
+        "sales list (station, 30 days)": lambda: get_sales(
+            station_id=station.id, fuel_type_id=None, start_date=month_ago, end_date=None, **list_args),
+        "sales list (station, fuel)": lambda: get_sales(
+            station_id=station.id, fuel_type_id=fuel_type_id, start_date=None, end_date=None, **list_args),
+        "sales list (org, 30 days, total)": lambda: get_sales(
+            station_id=None, fuel_type_id=None, start_date=month_ago, end_date=None,
+            **{**list_args, "include_total": True}),
+        "invoice list (station, 30 days)": lambda: get_invoices(
+            station_id=station.id, fuel_type_id=None, start_date=month_ago, end_date=None, search=None, **list_args),
+        "invoice list (station, fuel)": lambda: get_invoices(
+            station_id=station.id, fuel_type_id=fuel_type_id, start_date=None, end_date=None, search=None,
+            **list_args),
+        "sale cost basis lookup": lambda: get_average_cost_price(db, station.id, fuel_type_id, date.today()),
+        "rollup rebuild (1 station)": lambda: rebuild_daily_summary(db, [station.id]),
+    }
+    try:
+        return {name: median_ms(func, repeat) for name, func in queries.items()}
+    finally:
+        loop.run_until_complete(async_db.close())
+        loop.close()
+
+
+def hot_query_indexes() -> list:
+    """The models' Index objects for the indexes the 0001 migration creates"""
+    spec = importlib.util.spec_from_file_location("hot_query_indexes", INDEX_MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    names = {name for name, _, _ in migration.INDEXES}
+    return [index for table in Base.metadata.sorted_tables for index in table.indexes if index.name in names]
+
+
+def run_benchmark(database_url: str = None, organizations: int = 5, stations_per_org: int = 10,
+                  days: int = 730, repeat: int = 20):
+    # Time the queries rather than the dashboard response cache
+    settings.DASHBOARD_CACHE_SECONDS = 0
+
+    scratch_dir = None
+    if database_url is None:
+        scratch_dir = tempfile.mkdtemp(prefix="gasstation-bench-")
+        database_url = f"sqlite:///{os.path.join(scratch_dir, 'bench.db')}"
+
+    bench_engine = create_engine(database_url)
+    BenchSession = sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+    Base.metadata.create_all(bind=bench_engine)
+    # The dashboard runs on the async engine; NullPool keeps its connections on one event loop
+    bench_async_engine = create_async_engine(async_database_url(database_url), poolclass=NullPool)
+    AsyncBenchSession = async_sessionmaker(bench_async_engine, autoflush=False, expire_on_commit=False)
+
+    db = BenchSession()
+    try:
+        if db.query(Station.id).first() is not None:
+            print("[ERROR] The benchmark needs an empty scratch database")
+            return
+
+        started = time.perf_counter()
+        sale_count = populate(db, organizations, stations_per_org, days)
+        rebuild_daily_summary(db)
+        print(f"[OK] {sale_count} sales and their invoices generated in {time.perf_counter() - started:.1f}s")
+
+        # create_all built the current schema, indexes included
+        indexes = hot_query_indexes()
+        with bench_engine.begin() as connection:
+            for index in indexes:
+                index.drop(connection, checkfirst=True)
+        before = run_queries(db, AsyncBenchSession, repeat)
+
+        with bench_engine.begin() as connection:
+            for index in indexes:
+                index.create(connection, checkfirst=True)
+        after = run_queries(db, AsyncBenchSession, repeat)
+    finally:
+        db.close()
+        bench_engine.dispose()
+        asyncio.run(bench_async_engine.dispose())
+        if scratch_dir:
+            for name in os.listdir(scratch_dir):
+                os.remove(os.path.join(scratch_dir, name))
+            os.rmdir(scratch_dir)
+
+    print(f"\n{'query':<36}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in before:
+        print(f"{name:<36}{before[name]:>12.2f}{after[name]:>12.2f}{before[name] / after[name]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark hot queries before and after the composite indexes")
+    parser.add_argument("--database-url", default=None, help="Empty scratch database (default: temporary SQLite file)")
+    parser.add_argument("--organizations", type=int, default=5)
+    parser.add_argument("--stations-per-org", type=int, default=10)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query (median is reported)")
+    args = parser.parse_args()
+
+    run_benchmark(args.database_url, args.organizations, args.stations_per_org, args.days, args.repeat)
@@ -0,0 +1,69 @@
+"""
+Read fields from uploaded invoice PDFs that have not been extracted yet, in
+parallel across CPU cores. Use it to process PDFs uploaded before automatic
+extraction existed, to retry extractions left pending (server stopped before the
+worker finished) or failed, or to re-run extraction with --all.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from collections import defaultdict
+from app.db.database import SessionLocal, engine
+from app.db.migrations import upgrade_database
+from app.models import Invoice, InvoiceExtraction
+from app.services.pdf_extraction import (
+    queue_extraction, submit_extraction, shutdown_extraction_pool, metrics, STATUS_PENDING, STATUS_FAILED
+)
+
+
+def run_extraction(include_extracted: bool = False):
+    """Queue and process every invoice PDF without a finished extraction (or all of them)"""
+    upgrade_database(engine)
+
+    db = SessionLocal()
+    try:
+        query = db.query(Invoice).filter(Invoice.pdf_file_path.isnot(None))
+        if not include_extracted:
+            # Pending ones were cancelled at shutdown or lost with a crashed worker
+            finished = db.query(InvoiceExtraction.invoice_id).filter(
+                InvoiceExtraction.status.notin_([STATUS_PENDING, STATUS_FAILED])
+            )
+            query = query.filter(~Invoice.id.in_(finished))
+
+        # Invoices sharing a stored PDF are parsed once
+        extraction_ids_by_path = defaultdict(list)
+        for invoice in query.all():
+            extraction = queue_extraction(db, invoice)
+            db.flush()
+            extraction_ids_by_path[invoice.pdf_file_path].append(extraction.id)
+        db.commit()
+    finally:
+        db.close()
+
+    if not extraction_ids_by_path:
+        print("[OK] No invoice PDFs to extract")
+        return
+
+    print(f"Extracting {len(extraction_ids_by_path)} PDFs...")
+    started = time.monotonic()
+    futures = [submit_extraction(ids, path) for path, ids in extraction_ids_by_path.items()]
+    # Waits for the workers and the result writes
+    shutdown_extraction_pool(wait=True)
+    elapsed = time.monotonic() - started
+
+    snapshot = metrics.snapshot()
+    print(
+        f"[OK] {snapshot['completed']} extracted, {snapshot['failed']} failed "
+        f"in {elapsed:.1f}s ({len(futures) / elapsed:.1f} PDFs/s, {snapshot['workers']} workers)"
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Extract fields from uploaded invoice PDFs")
+    parser.add_argument("--all", action="store_true", help="Also re-extract completed and confirmed PDFs")
+    args = parser.parse_args()
+
+    run_extraction(args.all)
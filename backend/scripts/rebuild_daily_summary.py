@@ -0,0 +1,39 @@
+"""
+Rebuild the daily_station_fuel_summary rollup from the raw sales and invoices tables.
+Use it to backfill after upgrading, or to repair the rollup after direct database edits.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import SessionLocal, engine
+from app.db.migrations import upgrade_database
+from app.models import Station
+from app.services.daily_summary import rebuild_daily_summary
+
+
+def run_rebuild(organization_id: int = None):
+    """Rebuild the rollup for one organization, or for every station"""
+    upgrade_database(engine)
+
+    db = SessionLocal()
+    try:
+        station_ids = None
+        if organization_id is not None:
+            station_ids = [
+                s.id for s in db.query(Station.id).filter(Station.organization_id == organization_id).all()
+            ]
+
+        rows = rebuild_daily_summary(db, station_ids)
+        print(f"[OK] Daily summary rebuilt ({rows} rows)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Rebuild the daily station/fuel summary rollup")
+    parser.add_argument("--organization-id", type=int, default=None, help="Only rebuild this organization's stations")
+    args = parser.parse_args()
+
+    run_rebuild(args.organization_id)
@@ -0,0 +1,36 @@
+"""
+Recompute the stored cost price, profit margin and total profit of sales
+from invoice history. The 0002 migration backfills them on upgrade; use this
+to repair them after editing invoices or sales directly in the database.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import SessionLocal
+from app.models import Station
+from app.services.cost_basis import recompute_sale_costs
+
+
+def run_recompute(organization_id: int = None):
+    """Recompute sale costs for one organization, or for every station"""
+    db = SessionLocal()
+    try:
+        stations_query = db.query(Station.id)
+        if organization_id is not None:
+            stations_query = stations_query.filter(Station.organization_id == organization_id)
+        station_ids = [s.id for s in stations_query.all()]
+
+        updated = recompute_sale_costs(db, station_ids)
+        print(f"[OK] Cost and profit recomputed for {updated} sales")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Recompute stored sale cost and profit columns")
+    parser.add_argument("--organization-id", type=int, default=None, help="Only recompute this organization's sales")
+    args = parser.parse_args()
+
+    run_recompute(args.organization_id)
@@ -11,9 +11,13 @@ from decimal import Decimal
 import random
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal, engine, Base
-from app.models import Organization, User, Station, FuelType, Invoice, Sale
+from app.db.migrations import upgrade_database
+from app.models import Organization, User, Station, FuelType, Invoice, InvoiceExtraction, Sale, DailyStationFuelSummary
 from app.core.security import get_password_hash
 from app.core.config import settings
+from app.services.daily_summary import rebuild_daily_summary
+from app.services.cost_basis import recompute_sale_costs
+from app.services.pdf_store import release_pdf_reference, collect_pdf_file
 
 
 def drop_tables():
@@ -23,8 +27,8 @@ def drop_tables():
 
 
 def create_tables():
-    """Create all database tables"""
-    Base.metadata.create_all(bind=engine)
+    """Create all database tables, or migrate a database created by an earlier version"""
+    upgrade_database(engine)
     print("[OK] Database tables created")
 
 
@@ -309,9 +313,23 @@ def reset_demo_data(db: Session):
     stations = db.query(Station).filter(Station.organization_id == demo_org.id).all()
     station_ids = [s.id for s in stations]
 
+    released_pdfs = []
     if station_ids:
-        # Delete sales and invoices
+        # Release the invoices' stored PDFs
+        pdf_paths = db.query(Invoice.pdf_file_path).filter(
+            Invoice.station_id.in_(station_ids),
+            Invoice.pdf_file_path.isnot(None)
+        ).all()
+        released_pdfs = [path for path in (release_pdf_reference(db, p.pdf_file_path) for p in pdf_paths) if path]
+
+        # Delete rollup rows, sales and invoices
+        db.query(DailyStationFuelSummary).filter(
+            DailyStationFuelSummary.station_id.in_(station_ids)
+        ).delete(synchronize_session=False)
         db.query(Sale).filter(Sale.station_id.in_(station_ids)).delete(synchronize_session=False)
+        db.query(InvoiceExtraction).filter(
+            InvoiceExtraction.invoice_id.in_(db.query(Invoice.id).filter(Invoice.station_id.in_(station_ids)))
+        ).delete(synchronize_session=False)
         db.query(Invoice).filter(Invoice.station_id.in_(station_ids)).delete(synchronize_session=False)
 
     db.query(Station).filter(Station.organization_id == demo_org.id).delete(synchronize_session=False)
@@ -322,6 +340,8 @@ def reset_demo_data(db: Session):
     db.query(FuelType).delete(synchronize_session=False)
 
     db.commit()
+    for path in released_pdfs:
+        collect_pdf_file(path)
     print("[OK] Demo data reset complete")
 
 
@@ -349,6 +369,14 @@ def run_seed():
         # Create sales (60 days of data)
         seed_sales(db, stations, fuel_types, days=60)
 
+        # Store cost and profit on the seeded sales
+        updated = recompute_sale_costs(db, [s.id for s in stations])
+        print(f"[OK] Cost and profit stored for {updated} sales")
+
+        # Build the daily rollup for the seeded data
+        rows = rebuild_daily_summary(db, [s.id for s in stations])
+        print(f"[OK] Daily summary built ({rows} rows)")
+
         print("\n=== Database seeding complete! ===")
         print("\nDemo Account Details:")
         print(f"   Email: {settings.DEMO_EMAIL}")
@@ -374,6 +402,7 @@ if __name__ == "__main__":
         drop_tables()
 
     if args.reset:
+        create_tables()  # Reset deletes from the current tables; bring an older database up first
         db = SessionLocal()
         reset_demo_data(db)
         db.close()
@@ -0,0 +1,54 @@
+"""
+Tests run against a scratch SQLite database seeded with the demo account
+(5 stations, 60 days of invoices and sales), created once per session.
+"""
+import os
+import tempfile
+
+_scratch_dir = tempfile.mkdtemp(prefix="gasstation-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_scratch_dir}/test.db"
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    response = client.post("/api/auth/login", json={
+        "email": settings.DEMO_EMAIL,
+        "password": settings.DEMO_PASSWORD
+    })
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def organization_id(client, auth_headers):
+    return client.get("/api/auth/me", headers=auth_headers).json()["organization_id"]
+
+
+@pytest.fixture
+def ok():
+    """Check that an API response succeeded and return it"""
+    def check(response):
+        assert response.status_code < 300, response.text
+        return response
+    return check
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
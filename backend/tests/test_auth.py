@@ -0,0 +1,33 @@
+from app.core.config import settings
+from app.models import User
+from app.services import user_status
+from app.services.user_status import UserStatus, _UserStatusCache
+
+
+def test_disabling_a_user_takes_effect_on_commit(client, db):
+    response = client.post("/api/auth/register", json={
+        "email": "disabled@example.com", "password": "secret123", "full_name": "Soon Disabled",
+        "business_name": "Disabled Fuel"
+    })
+    assert response.status_code == 200, response.text
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get("/api/stations", headers=headers).status_code == 200  # Status now cached
+
+    user = db.query(User).filter(User.email == "disabled@example.com").one()
+    user.is_admin = True
+    db.commit()
+    assert user_status._user_status.get(user.id) is None
+
+    assert client.get("/api/stations", headers=headers).status_code == 200
+    user.is_active = False
+    db.commit()
+    assert client.get("/api/stations", headers=headers).status_code == 403
+
+
+def test_expired_statuses_are_swept(monkeypatch):
+    monkeypatch.setattr(user_status, "MIN_SWEEP_SIZE", 4)
+    monkeypatch.setattr(settings, "USER_STATUS_CACHE_SECONDS", 0)
+    cache = _UserStatusCache()
+    for user_id in range(100):
+        cache.set(user_id, UserStatus(is_active=True, is_admin=False))
+    assert len(cache._entries) < 4
@@ -0,0 +1,57 @@
+from datetime import date
+from decimal import Decimal
+from app.api.sales import get_average_cost_price
+from app.models import Sale
+from app.services.cost_basis import CostBasisIndex, recompute_sale_costs
+
+STATION_ID = 5
+FUEL_TYPE_ID = 3
+# Written out of date order, two on the same day
+INVOICES = [("2019-03-20", "2.9871"), ("2019-03-01", "3.1013"), ("2019-03-10", "2.8333"), ("2019-03-10", "3.0001")]
+
+
+def test_every_path_stores_the_same_running_average(client, auth_headers, db, ok):
+    for number, (invoice_date, price) in enumerate(INVOICES):
+        ok(client.post("/api/invoices", json={
+            "invoice_number": f"COST-{number}", "invoice_date": invoice_date, "supplier_name": "Cost Basis Supply",
+            "station_id": STATION_ID, "fuel_type_id": FUEL_TYPE_ID, "quantity": "1000", "price_per_unit": price
+        }, headers=auth_headers))
+
+    sale = {"station_id": STATION_ID, "fuel_type_id": FUEL_TYPE_ID, "quantity_sold": "33.33", "price_per_unit": "3.49"}
+    single_ids = [
+        ok(client.post("/api/sales", json={**sale, "sale_date": sale_date}, headers=auth_headers)).json()["id"]
+        for sale_date in ("2019-02-28", "2019-03-05", "2019-03-10", "2019-03-25")
+    ]
+    ok(client.post("/api/sales/bulk", json=[
+        {**sale, "sale_date": sale_date} for sale_date in ("2019-03-05", "2019-03-10", "2019-03-25")
+    ], headers=auth_headers))
+
+    expected = {
+        date(2019, 2, 28): None,
+        date(2019, 3, 5): Decimal("3.1013"),
+        date(2019, 3, 10): Decimal("2.9782"),  # 8.9347 / 3 = 2.97823...
+        date(2019, 3, 25): Decimal("2.9805"),  # 11.9218 / 4 = 2.98045
+    }
+    index = CostBasisIndex.build(db, [STATION_ID], FUEL_TYPE_ID)
+    for sale_date, cost_price in expected.items():
+        assert index.average_cost_price(STATION_ID, FUEL_TYPE_ID, sale_date) == cost_price
+        assert get_average_cost_price(db, STATION_ID, FUEL_TYPE_ID, sale_date) == cost_price
+
+    def stored():
+        return sorted(
+            (sale.sale_date, sale.id in single_ids, sale.cost_price, sale.profit_margin, sale.total_profit)
+            for sale in db.query(Sale).filter(
+                Sale.station_id == STATION_ID, Sale.fuel_type_id == FUEL_TYPE_ID, Sale.sale_date < date(2019, 4, 1)
+            )
+        )
+
+    before = stored()
+    assert len(before) == 7
+    assert all(cost_price == expected[sale_date] for sale_date, _, cost_price, _, _ in before)
+    # Single and bulk writes store exactly what a full recompute does
+    for sale_date in (date(2019, 3, 5), date(2019, 3, 10), date(2019, 3, 25)):
+        single, bulk = [row[2:] for row in before if row[0] == sale_date]
+        assert single == bulk
+    recompute_sale_costs(db, [STATION_ID], FUEL_TYPE_ID)
+    db.expire_all()
+    assert stored() == before
@@ -0,0 +1,113 @@
+import threading
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import event, func
+from app.db.database import SessionLocal, engine
+from app.models import DailyStationFuelSummary, Invoice, Sale
+from app.services.daily_summary import SUMMARY_FIELDS, _apply_delta
+
+CENT = Decimal("0.01")
+
+
+def rounded(values):
+    return tuple(Decimal(str(value)).quantize(CENT) for value in values)
+
+
+def rollup_totals(db):
+    """Rollup rows by (station, fuel type, date), leaving out rows emptied by deletes"""
+    totals = {}
+    for station_id, fuel_type_id, summary_date, *values in db.query(
+        DailyStationFuelSummary.station_id,
+        DailyStationFuelSummary.fuel_type_id,
+        DailyStationFuelSummary.summary_date,
+        *[getattr(DailyStationFuelSummary, field) for field in SUMMARY_FIELDS]
+    ):
+        if any(values):
+            totals[(station_id, fuel_type_id, summary_date)] = rounded(values)
+    return totals
+
+
+def raw_totals(db):
+    """The same totals aggregated from the raw sales and invoices"""
+    totals = {}
+    for station_id, fuel_type_id, sale_date, quantity, revenue in db.query(
+        Sale.station_id, Sale.fuel_type_id, Sale.sale_date, func.sum(Sale.quantity_sold), func.sum(Sale.total_sales)
+    ).group_by(Sale.station_id, Sale.fuel_type_id, Sale.sale_date):
+        totals[(station_id, fuel_type_id, sale_date)] = [quantity, revenue, 0, 0]
+    for station_id, fuel_type_id, invoice_date, quantity, cost in db.query(
+        Invoice.station_id, Invoice.fuel_type_id, Invoice.invoice_date,
+        func.sum(Invoice.quantity), func.sum(Invoice.total_amount)
+    ).group_by(Invoice.station_id, Invoice.fuel_type_id, Invoice.invoice_date):
+        totals.setdefault((station_id, fuel_type_id, invoice_date), [0, 0, 0, 0])[2:] = [quantity, cost]
+    return {key: rounded(values) for key, values in totals.items()}
+
+
+def test_rollup_matches_raw_tables_after_api_writes(client, auth_headers, db, ok):
+    sale = {
+        "sale_date": "2026-09-10", "station_id": 1, "fuel_type_id": 1,
+        "quantity_sold": "120.50", "price_per_unit": "3.10"
+    }
+    sale_id = ok(client.post("/api/sales", json=sale, headers=auth_headers)).json()["id"]
+    # Moved to another date, station and fuel type
+    ok(client.put(
+        f"/api/sales/{sale_id}",
+        json={"sale_date": "2026-09-11", "station_id": 2, "fuel_type_id": 3, "quantity_sold": "80"},
+        headers=auth_headers
+    ))
+    second_id = ok(client.post("/api/sales", json={**sale, "quantity_sold": "10"}, headers=auth_headers)).json()["id"]
+    ok(client.delete(f"/api/sales/{second_id}", headers=auth_headers))
+    bulk = client.post("/api/sales/bulk", json=[
+        {**sale, "sale_date": "2026-09-12"}, {**sale, "sale_date": "2026-09-12", "quantity_sold": "5"}
+    ], headers=auth_headers)
+    assert bulk.json()["created"] == 2
+
+    invoice = {
+        "invoice_number": "ROLLUP-1", "invoice_date": "2026-09-10", "supplier_name": "Test Supplier",
+        "station_id": 1, "fuel_type_id": 2, "quantity": "900", "price_per_unit": "2.75"
+    }
+    invoice_id = ok(client.post("/api/invoices", json=invoice, headers=auth_headers)).json()["id"]
+    ok(client.put(
+        f"/api/invoices/{invoice_id}", json={"invoice_date": "2026-09-13", "quantity": "950"}, headers=auth_headers
+    ))
+    removed = ok(client.post("/api/invoices", json={**invoice, "invoice_number": "ROLLUP-2"}, headers=auth_headers))
+    ok(client.delete(f"/api/invoices/{removed.json()['id']}", headers=auth_headers))
+
+    assert rollup_totals(db) == raw_totals(db)
+
+
+def test_first_deltas_for_a_new_key_are_upserted(db):
+    key = {"station_id": 1, "fuel_type_id": 1, "summary_date": date(2031, 1, 1)}
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "daily_station_fuel_summary" in statement and not statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    # Concurrent writers of the same new key: each must add to the row, none may fail
+    # on the unique key because another one inserted it first
+    errors = []
+
+    def write_sale():
+        session = SessionLocal()
+        try:
+            _apply_delta(session, quantity_sold=Decimal("2"), sales_revenue=Decimal("6"), **key)
+            session.commit()
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            session.close()
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        threads = [threading.Thread(target=write_sale) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert errors == []
+    assert all("ON CONFLICT" in statement for statement in statements)
+    row = db.query(DailyStationFuelSummary).filter_by(**key).one()
+    assert rounded([row.quantity_sold, row.sales_revenue]) == rounded([8, 24])
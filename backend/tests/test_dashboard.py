@@ -0,0 +1,168 @@
+import asyncio
+from datetime import date, timedelta
+from decimal import Decimal
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import settings
+from app.db.database import async_database_url, get_async_db
+from app.main import app
+from app.models import Sale
+from app.services import dashboard_cache as dashboard_cache_module
+from app.services.dashboard_cache import DashboardKey, _DashboardCache, record_dashboard_change
+from app.services.dimension_cache import invalidate_stations
+
+POOL_SIZE = 4
+
+
+def test_concurrent_dashboards_with_cold_station_cache_share_the_pool(auth_headers, organization_id, monkeypatch):
+    # As many requests as connections, each loading station names on a cold cache.
+    # If their sessions kept those connections, none would be left for the dashboard
+    # queries and every request would time out waiting for the pool.
+    small_engine = create_async_engine(
+        async_database_url(settings.DATABASE_URL),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=2
+    )
+    small_sessions = async_sessionmaker(small_engine, autoflush=False, expire_on_commit=False)
+
+    async def small_pool_db():
+        async with small_sessions() as db:
+            yield db
+
+    async def request_dashboards():
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                # Distinct periods, so the requests don't share one build
+                return await asyncio.gather(*[
+                    http.get("/api/dashboard", params={"days": 7 + i}, headers=auth_headers)
+                    for i in range(POOL_SIZE)
+                ])
+        finally:
+            await small_engine.dispose()
+
+    monkeypatch.setattr(settings, "DASHBOARD_CACHE_SECONDS", 0)
+    monkeypatch.setitem(app.dependency_overrides, get_async_db, small_pool_db)
+    invalidate_stations(organization_id)
+    responses = asyncio.run(request_dashboards())
+
+    assert [response.status_code for response in responses] == [200] * POOL_SIZE
+    assert all(response.json()["kpis"]["station_count"] == 5 for response in responses)
+
+
+def metrics(client, auth_headers):
+    return client.get("/api/dashboard/cache/metrics", headers=auth_headers).json()
+
+
+def test_sale_commit_drops_only_the_dashboards_it_affects(client, auth_headers):
+    def dashboard(station_id):
+        response = client.get("/api/dashboard", params={"station_id": station_id}, headers=auth_headers)
+        assert response.status_code == 200
+        return response.json()
+
+    before = dashboard(3)
+    dashboard(4)
+    assert dashboard(3) == before  # Served from the cache
+    start = metrics(client, auth_headers)
+
+    response = client.post("/api/sales", json={
+        "sale_date": date.today().isoformat(), "station_id": 3, "fuel_type_id": 1,
+        "quantity_sold": "10", "price_per_unit": "3.50"
+    }, headers=auth_headers)
+    assert response.status_code == 201, response.text
+    after_commit = metrics(client, auth_headers)
+    assert after_commit["invalidations"] > start["invalidations"]
+
+    after = dashboard(3)
+    assert Decimal(after["kpis"]["total_sales_today"]) == Decimal(before["kpis"]["total_sales_today"]) + Decimal("35")
+    dashboard(4)  # Another station's dashboard is still cached
+    end = metrics(client, auth_headers)
+    assert (end["misses"], end["hits"]) == (after_commit["misses"] + 1, after_commit["hits"] + 1)
+
+
+def cached_key(station_id=1):
+    today = date.today()
+    return DashboardKey(1, station_id, today - timedelta(days=29), today, "day", None, today)
+
+
+def test_changes_are_invalidated_on_commit_not_on_rollback(db, monkeypatch):
+    cache = _DashboardCache()
+    monkeypatch.setattr(dashboard_cache_module, "dashboard_cache", cache)
+    builds = []
+
+    async def builder():
+        builds.append(object())
+        return builds[-1]
+
+    def lookup():
+        return asyncio.run(cache.get(cached_key(), {1}, builder))
+
+    first = lookup()
+    db.execute(select(Sale.id).limit(1))  # Writes record their changes inside a transaction
+    record_dashboard_change(db, 1, date.today())
+    db.rollback()
+    db.commit()
+    assert lookup() is first
+
+    # A savepoint rolled back keeps the changes made before it
+    db.execute(select(Sale.id).limit(1))
+    record_dashboard_change(db, 1, date.today())
+    savepoint = db.begin_nested()
+    record_dashboard_change(db, 2, date.today())
+    savepoint.rollback()
+    assert lookup() is first  # Not committed yet
+    db.commit()
+    assert lookup() is not first
+    assert len(builds) == 2 and cache.invalidations == 1
+
+
+def test_identical_misses_share_one_build():
+    cache = _DashboardCache()
+    calls = 0
+
+    async def run():
+        release = asyncio.Event()
+
+        async def builder():
+            nonlocal calls
+            calls += 1
+            number = calls
+            await release.wait()
+            return f"response {number}"
+
+        lookups = [asyncio.ensure_future(cache.get(cached_key(), {1}, builder)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*lookups)
+
+    assert asyncio.run(run()) == ["response 1"] * 5
+    assert (calls, cache.misses, cache.coalesced) == (1, 1, 4)
+
+
+def test_build_overtaken_by_a_write_is_neither_joined_nor_stored():
+    cache = _DashboardCache()
+    calls = 0
+
+    async def run():
+        release = asyncio.Event()
+
+        async def builder():
+            nonlocal calls
+            calls += 1
+            number = calls
+            await release.wait()
+            return f"response {number}"
+
+        stale = asyncio.ensure_future(cache.get(cached_key(), {1}, builder))
+        await asyncio.sleep(0)
+        cache.invalidate([(1, date.today())])
+        release.set()
+        joined = await cache.get(cached_key(), {1}, builder)  # Started after the write
+        return await stale, joined, await cache.get(cached_key(), {1}, builder)
+
+    assert asyncio.run(run()) == ("response 1", "response 2", "response 2")
+    assert (calls, cache.coalesced, cache.hits) == (2, 0, 1)
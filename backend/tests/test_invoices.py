@@ -0,0 +1,173 @@
+import asyncio
+from app.api import invoices
+from app.models import Invoice, InvoiceExtraction
+from app.services import pdf_store
+from app.services.pdf_extraction import STATUS_COMPLETED, STATUS_FAILED, STATUS_PENDING
+from scripts import extract_invoice_pdfs
+
+STATEMENT_HEADER = "Invoice #,Invoice Date,Supplier,Station ID,Fuel Type ID,Quantity,Price Per Unit\n"
+
+
+def import_statement(client, auth_headers, rows):
+    csv_text = STATEMENT_HEADER + "".join(f"{row}\n" for row in rows)
+    response = client.post(
+        "/api/invoices/import",
+        files={"file": ("statement.csv", csv_text.encode(), "text/csv")},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_import_keeps_every_product_line_of_a_statement(client, auth_headers):
+    regular = "IMP-900001,2026-09-01,Test Supplier,1,1,1000,2.50"
+    premium = "IMP-900001,2026-09-01,Test Supplier,1,2,500,2.90"
+
+    result = import_statement(client, auth_headers, [regular, premium, premium])
+    assert result["created"] == 2
+    assert [duplicate["row"] for duplicate in result["duplicates"]] == [3]
+
+    # Importing the statement again finds both lines already stored
+    result = import_statement(client, auth_headers, [regular, premium])
+    assert result["created"] == 0
+    assert result["duplicate_count"] == 2
+
+
+def test_import_accepts_a_number_reused_at_another_station(client, auth_headers):
+    import_statement(client, auth_headers, ["IMP-900002,2026-09-02,Test Supplier,1,3,800,3.10"])
+
+    result = import_statement(client, auth_headers, ["IMP-900002,2026-09-02,Test Supplier,2,3,800,3.10"])
+    assert result["created"] == 1
+    assert result["duplicate_count"] == 0
+
+
+def first_invoice_id(client, auth_headers):
+    return client.get("/api/invoices", params={"limit": 1}, headers=auth_headers).json()["items"][0]["id"]
+
+
+def test_pdf_upload_does_its_blocking_work_off_the_event_loop(client, auth_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_store, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(invoices, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(invoices, "submit_extraction", lambda *args: None)
+
+    on_event_loop = []
+
+    def recording(function):
+        def wrapper(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                on_event_loop.append(function.__name__)
+            except RuntimeError:
+                pass
+            return function(*args, **kwargs)
+        return wrapper
+
+    for name in ("add_pdf_reference", "release_pdf_reference", "queue_extraction"):
+        monkeypatch.setattr(invoices, name, recording(getattr(invoices, name)))
+
+    invoice_id = first_invoice_id(client, auth_headers)
+    response = client.post(
+        f"/api/invoices/{invoice_id}/upload-pdf",
+        files={"file": ("invoice.pdf", b"%PDF-1.4 upload test", "application/pdf")},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["pdf_file_path"].startswith(str(tmp_path))
+    assert on_event_loop == []
+
+
+def invoice_with_extraction(client, auth_headers, db, fuel_type_id, lines):
+    """An invoice whose PDF was read into the given lines (fuel type id, quantity, price)"""
+    response = client.post("/api/invoices", json={
+        "invoice_number": "CONFIRM-1", "invoice_date": "2026-09-20", "supplier_name": "Test Supplier",
+        "station_id": 3, "fuel_type_id": fuel_type_id, "quantity": "1429", "price_per_unit": "3.20"
+    }, headers=auth_headers)
+    invoice = db.query(Invoice).filter(Invoice.id == response.json()["id"]).one()
+    invoice.pdf_file_path = f"/uploads/test-{invoice.id}.pdf"
+    db.add(InvoiceExtraction(
+        invoice_id=invoice.id,
+        pdf_file_path=invoice.pdf_file_path,
+        status=STATUS_COMPLETED,
+        proposal={
+            "invoice_number": "2071999",
+            "invoice_date": "2026-09-21",
+            "lines": [
+                {"product": f"FUEL {fuel}", "fuel_type_id": fuel, "quantity": quantity, "price_per_unit": price}
+                for fuel, quantity, price in lines
+            ]
+        }
+    ))
+    db.commit()
+    return invoice.id
+
+
+def test_confirm_refuses_to_keep_an_unmatched_line_next_to_new_ones(client, auth_headers, db):
+    invoice_id = invoice_with_extraction(client, auth_headers, db, 3, [(1, "1000", "2.50"), (2, "400", "2.90")])
+
+    response = client.post(f"/api/invoices/{invoice_id}/extraction/confirm", headers=auth_headers)
+    assert response.status_code == 409
+    assert client.get(f"/api/invoices/{invoice_id}", headers=auth_headers).json()["invoice_number"] == "CONFIRM-1"
+
+    response = client.post(
+        f"/api/invoices/{invoice_id}/extraction/confirm", params={"replace_line": 0}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    confirmed = response.json()
+    assert [(row["fuel_type_id"], float(row["quantity"])) for row in confirmed] == [(1, 1000), (2, 400)]
+    assert {row["invoice_number"] for row in confirmed} == {"2071999"}
+
+    # Purchases counted once: the original 1429 gal line was replaced, not kept
+    statement = db.query(Invoice.fuel_type_id, Invoice.quantity).filter(Invoice.invoice_number == "2071999").all()
+    assert sorted((fuel_type_id, float(quantity)) for fuel_type_id, quantity in statement) == [(1, 1000), (2, 400)]
+
+
+def test_confirm_rejects_a_line_without_a_fuel_type(client, auth_headers, db):
+    invoice_id = invoice_with_extraction(client, auth_headers, db, 3, [(1, "1000", "2.50")])
+
+    response = client.post(
+        f"/api/invoices/{invoice_id}/extraction/confirm", params={"replace_line": 5}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
+def test_extraction_script_retries_pending_and_failed_pdfs(client, auth_headers, db, monkeypatch):
+    paths = {}
+    for status in (None, STATUS_PENDING, STATUS_FAILED, STATUS_COMPLETED):
+        response = client.post("/api/invoices", json={
+            "invoice_number": f"RETRY-{status}", "invoice_date": "2026-08-01", "supplier_name": "P & J Fuel Inc",
+            "station_id": 2, "fuel_type_id": 1, "quantity": "500", "price_per_unit": "2.40"
+        }, headers=auth_headers)
+        invoice = db.get(Invoice, response.json()["id"])
+        invoice.pdf_file_path = paths[status] = f"retry/{status}.pdf"
+        if status is not None:
+            db.add(InvoiceExtraction(invoice_id=invoice.id, pdf_file_path=invoice.pdf_file_path, status=status))
+    db.commit()
+
+    submitted = []
+    monkeypatch.setattr(extract_invoice_pdfs, "upgrade_database", lambda engine: None)
+    monkeypatch.setattr(extract_invoice_pdfs, "submit_extraction", lambda ids, path: submitted.append(path))
+    monkeypatch.setattr(extract_invoice_pdfs, "shutdown_extraction_pool", lambda wait: None)
+    extract_invoice_pdfs.run_extraction()
+
+    assert {paths[None], paths[STATUS_PENDING], paths[STATUS_FAILED]} <= set(submitted)
+    assert paths[STATUS_COMPLETED] not in submitted
+
+
+def test_import_failing_midway_refreshes_sale_costs_of_committed_batches(client, auth_headers, db, monkeypatch):
+    response = client.post("/api/sales", json={
+        "sale_date": "2018-05-02", "station_id": 4, "fuel_type_id": 2, "quantity_sold": "100", "price_per_unit": "3.00"
+    }, headers=auth_headers)
+    sale_id = response.json()["id"]
+    assert response.json()["cost_price"] is None
+
+    monkeypatch.setattr(invoices, "IMPORT_BATCH_SIZE", 1)
+    # Enough rejected rows that the undecodable bytes are read after the first batch commits
+    rows = ["MIDWAY-1,2018-05-01,P & J Fuel Inc,4,2,1000,2.5"] + ["MIDWAY-X,2018-05-01,P & J Fuel Inc,999,2,1,1"] * 500
+    csv_bytes = (STATEMENT_HEADER + "".join(f"{row}\n" for row in rows)).encode() + b"\xff\xfe broken\n"
+    response = client.post(
+        "/api/invoices/import", files={"file": ("statement.csv", csv_bytes, "text/csv")}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    assert db.query(Invoice).filter(Invoice.invoice_number == "MIDWAY-1").count() == 1
+    assert float(client.get(f"/api/sales/{sale_id}", headers=auth_headers).json()["cost_price"]) == 2.5
@@ -0,0 +1,170 @@
+import io
+import os
+import shutil
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from app.db.database import Base
+from app.db.migrations import ALEMBIC_DIR, upgrade_database
+from app.db.search import ensure_invoice_search
+from app.models import Station
+from app.services.cost_basis import recompute_sale_costs
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Committed demo database, created before the migrations existed
+OLD_DATABASE = os.path.join(BACKEND_DIR, "gasstation.db")
+
+HEAD = ScriptDirectory(ALEMBIC_DIR).get_current_head()
+
+
+def migrate(database_path: str, direction=command.upgrade, revision: str = "head"):
+    engine = create_engine(f"sqlite:///{database_path}")
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        direction(config, revision)
+    return engine
+
+
+def upgrade_to_head(database_path: str):
+    return migrate(database_path)
+
+
+def schema(engine):
+    """Columns, indexes and unique constraints of every table"""
+    inspector = inspect(engine)
+    return {
+        table: (
+            {column["name"] for column in inspector.get_columns(table)},
+            {
+                (index["name"], tuple(index["column_names"]), bool(index["unique"]))
+                for index in inspector.get_indexes(table)
+            },
+            {tuple(constraint["column_names"]) for constraint in inspector.get_unique_constraints(table)},
+        )
+        for table in inspector.get_table_names()
+        if table != "alembic_version"
+    }
+
+
+def sale_costs(engine):
+    with engine.connect() as connection:
+        return connection.execute(text(
+            "SELECT id, cost_price, profit_margin, total_profit FROM sales ORDER BY id"
+        )).all()
+
+
+def test_upgrade_adds_and_backfills_sale_cost_columns(tmp_path):
+    database_path = str(tmp_path / "old.db")
+    shutil.copy(OLD_DATABASE, database_path)
+
+    engine = upgrade_to_head(database_path)
+    try:
+        columns = {column["name"] for column in inspect(engine).get_columns("sales")}
+        assert {"cost_price", "profit_margin", "total_profit"} <= columns
+
+        backfilled = sale_costs(engine)
+        assert any(cost_price is not None for _, cost_price, _, _ in backfilled)
+
+        # Same values as the recompute script produces
+        with Session(engine) as db:
+            recompute_sale_costs(db, [station_id for station_id, in db.query(Station.id).all()])
+        assert sale_costs(engine) == backfilled
+    finally:
+        engine.dispose()
+
+
+def test_upgrade_is_a_no_op_on_a_current_schema(tmp_path):
+    database_path = str(tmp_path / "new.db")
+    engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    engine = upgrade_to_head(database_path)
+    try:
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar() is not None
+    finally:
+        engine.dispose()
+
+
+def test_upgraded_database_matches_a_new_one(tmp_path):
+    old_path = str(tmp_path / "old.db")
+    shutil.copy(OLD_DATABASE, old_path)
+    new_engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    Base.metadata.create_all(new_engine)
+    ensure_invoice_search(new_engine)
+
+    engine = upgrade_to_head(old_path)
+    try:
+        assert schema(engine) == schema(new_engine)
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT count(*) FROM daily_station_fuel_summary")).scalar() > 0
+    finally:
+        engine.dispose()
+        new_engine.dispose()
+
+
+def test_downgrade_and_upgrade_again(tmp_path):
+    database_path = str(tmp_path / "old.db")
+    shutil.copy(OLD_DATABASE, database_path)
+    upgrade_to_head(database_path).dispose()
+
+    engine = migrate(database_path, command.downgrade, "base")
+    try:
+        tables = set(inspect(engine).get_table_names())
+        assert "daily_station_fuel_summary" not in tables and "invoice_search" not in tables
+        # Invoice writes still work without the search triggers' table
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE invoices SET notes = 'checked' WHERE id = (SELECT min(id) FROM invoices)"))
+    finally:
+        engine.dispose()
+
+    upgrade_to_head(database_path).dispose()
+
+
+def current_revision(engine):
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def test_startup_migrates_an_old_database(tmp_path):
+    database_path = str(tmp_path / "old.db")
+    shutil.copy(OLD_DATABASE, database_path)
+    engine = create_engine(f"sqlite:///{database_path}")
+    try:
+        upgrade_database(engine)
+        assert {"cost_price", "profit_margin", "total_profit"} <= {
+            column["name"] for column in inspect(engine).get_columns("sales")
+        }
+        assert current_revision(engine) == HEAD
+    finally:
+        engine.dispose()
+
+
+def test_startup_creates_a_new_database_at_head(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    try:
+        upgrade_database(engine)
+        assert current_revision(engine) == HEAD
+        # Later upgrades start from the stamped revision
+        upgrade_database(engine)
+        assert "sales" in inspect(engine).get_table_names()
+    finally:
+        engine.dispose()
+
+
+def test_upgrade_emits_sql_offline():
+    output = io.StringIO()
+    config = Config(output_buffer=output)
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    command.upgrade(config, "head", sql=True)
+
+    sql = output.getvalue()
+    assert "ALTER TABLE sales ADD COLUMN cost_price" in sql
+    assert "CREATE TABLE daily_station_fuel_summary" in sql and "invoice_search" in sql
+    assert f"version_num='{HEAD}'" in sql
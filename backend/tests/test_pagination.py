@@ -0,0 +1,66 @@
+from decimal import Decimal
+from sqlalchemy import func
+from app.models import Invoice, Sale
+
+
+def walk(client, auth_headers, path, limit, **params):
+    """Every page of a listing, following next_cursor"""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(path, params={**params, "limit": limit, "cursor": cursor}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        pages.append(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_sale_pages_cover_every_row_once_in_order(client, auth_headers, db):
+    # Several fuel types a day, so pages split rows sharing a date
+    pages = walk(client, auth_headers, "/api/sales", 7, station_id=2)
+    expected = [
+        sale_id for sale_id, in db.query(Sale.id).filter(Sale.station_id == 2)
+        .order_by(Sale.sale_date.desc(), Sale.id.desc())
+    ]
+    assert all(len(page) == 7 for page in pages[:-1]) and 0 < len(pages[-1]) <= 7
+    assert [sale["id"] for page in pages for sale in page] == expected
+
+
+def test_earlier_pages_dont_shift_when_rows_are_added(client, auth_headers, db):
+    first = client.get("/api/invoices", params={"station_id": 1, "limit": 5}, headers=auth_headers).json()
+    newest = first["items"][0]
+    response = client.post("/api/invoices", json={
+        "invoice_number": "PAGE-NEW", "invoice_date": newest["invoice_date"], "supplier_name": "Paging Supply",
+        "station_id": 1, "fuel_type_id": 1, "quantity": "100", "price_per_unit": "2.5"
+    }, headers=auth_headers)
+    assert response.status_code == 201, response.text
+
+    second = client.get(
+        "/api/invoices", params={"station_id": 1, "limit": 5, "cursor": first["next_cursor"]}, headers=auth_headers
+    ).json()
+    last = first["items"][-1]
+    expected = [
+        invoice_id for invoice_id, in db.query(Invoice.id).filter(Invoice.station_id == 1)
+        .order_by(Invoice.invoice_date.desc(), Invoice.id.desc())
+    ]
+    start = expected.index(last["id"]) + 1
+    assert [invoice["id"] for invoice in second["items"]] == expected[start:start + 5]
+
+
+def test_invalid_cursor_is_rejected(client, auth_headers):
+    response = client.get("/api/sales", params={"cursor": "not a cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_sale_totals_cover_every_page(client, auth_headers, db):
+    page = client.get(
+        "/api/sales", params={"station_id": 2, "limit": 5, "include_total": True}, headers=auth_headers
+    ).json()
+    count, total_sales, total_profit = db.query(
+        func.count(Sale.id), func.sum(Sale.total_sales), func.sum(Sale.total_profit)
+    ).filter(Sale.station_id == 2).one()
+    assert len(page["items"]) == 5 and page["total_count"] == count > 5
+    assert Decimal(page["total_sales"]) == Decimal(str(total_sales)).quantize(Decimal("0.01"))
+    assert Decimal(page["total_profit"]) == Decimal(str(total_profit)).quantize(Decimal("0.01"))
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import threading
+import time
+from app.models import PdfBlob
+from app.services import pdf_store
+
+
+def stage_upload(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path), hashlib.sha256(content).hexdigest(), len(content)
+
+
+def test_blob_is_shared_and_collected_after_its_last_release(tmp_path, monkeypatch, db):
+    monkeypatch.setattr(pdf_store, "UPLOAD_DIR", str(tmp_path / "store"))
+    content = b"%PDF-1.4 shared blob"
+
+    first = pdf_store.add_pdf_reference(db, *stage_upload(tmp_path, "first.part", content))
+    second = pdf_store.add_pdf_reference(db, *stage_upload(tmp_path, "second.part", content))
+    db.refresh(second)
+    assert first.file_path == second.file_path
+    assert second.ref_count == 2
+    assert not (tmp_path / "second.part").exists()  # The duplicate upload was discarded
+    file_path = first.file_path
+    db.commit()
+
+    assert pdf_store.release_pdf_reference(db, file_path) is None
+    db.commit()
+    released = pdf_store.release_pdf_reference(db, file_path)
+    db.commit()
+    assert released == file_path
+
+    pdf_store.collect_pdf_file(released)
+    # The file and its now-empty <aa>/<bb> shard directories are gone; the store root stays
+    assert list((tmp_path / "store").iterdir()) == []
+
+
+def test_collecting_keeps_shard_directories_still_in_use(tmp_path, monkeypatch, db):
+    monkeypatch.setattr(pdf_store, "UPLOAD_DIR", str(tmp_path))
+    kept = tmp_path / "aa" / "11" / ("aa11" + "0" * 60 + ".pdf")
+    collected = tmp_path / "aa" / "22" / ("aa22" + "0" * 60 + ".pdf")
+    for path in (kept, collected):
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"%PDF-1.4")
+    # Released: the row stays at ref_count 0 until collected
+    db.add(PdfBlob(sha256=collected.stem, file_path=str(collected), size_bytes=8, ref_count=0))
+    db.commit()
+
+    pdf_store.collect_pdf_file(str(collected))
+
+    assert not collected.parent.exists()
+    assert kept.exists()
+
+
+def test_collecting_waits_for_an_upload_reusing_the_blob(tmp_path, monkeypatch, db):
+    monkeypatch.setattr(pdf_store, "UPLOAD_DIR", str(tmp_path / "store"))
+    content = b"%PDF-1.4 released and uploaded again"
+    file_path = pdf_store.add_pdf_reference(db, *stage_upload(tmp_path, "first.part", content)).file_path
+    db.commit()
+    released = pdf_store.release_pdf_reference(db, file_path)
+    db.commit()
+    assert released == file_path
+
+    # The same file is uploaded again before the collector runs; its reference is
+    # still uncommitted when the collector checks the blob
+    pdf_store.add_pdf_reference(db, *stage_upload(tmp_path, "again.part", content))
+    assert not (tmp_path / "again.part").exists()  # Relies on the stored file
+    collector = threading.Thread(target=pdf_store.collect_pdf_file, args=(released,))
+    collector.start()
+    time.sleep(0.3)
+    db.commit()
+    collector.join()
+
+    assert os.path.exists(file_path)
+    assert db.query(PdfBlob.ref_count).filter(PdfBlob.file_path == file_path).scalar() == 1
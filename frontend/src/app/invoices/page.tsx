@@ -42,6 +42,8 @@ export default function InvoicesPage() {
   const [stations, setStations] = useState<Station[]>([]);
   const [fuelTypes, setFuelTypes] = useState<FuelType[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [showModal, setShowModal] = useState(false);
   const [editingInvoice, setEditingInvoice] = useState<Invoice | null>(null);
   const [filterStation, setFilterStation] = useState<number | null>(null);
@@ -87,7 +89,8 @@ export default function InvoicesPage() {
         stationsApi.getAll(),
         fuelTypesApi.getAll(),
       ]);
-      setInvoices(invoicesRes.data);
+      setInvoices(invoicesRes.data.items);
+      setNextCursor(invoicesRes.data.next_cursor);
       setStations(stationsRes.data);
       setFuelTypes(fuelTypesRes.data);
     } catch (error) {
@@ -97,6 +100,26 @@ export default function InvoicesPage() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const invoicesRes = await invoicesApi.getAll({
+        station_id: filterStation || undefined,
+        search: searchQuery || undefined,
+        start_date: startDate || undefined,
+        end_date: endDate || undefined,
+        cursor: nextCursor,
+      });
+      setInvoices((prev) => [...prev, ...invoicesRes.data.items]);
+      setNextCursor(invoicesRes.data.next_cursor);
+    } catch (error) {
+      console.error('Failed to load more invoices:', error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const openModal = (invoice?: Invoice) => {
     if (invoice) {
       setEditingInvoice(invoice);
@@ -253,7 +276,7 @@ export default function InvoicesPage() {
               <Search className="absolute left-3 top-1/2 -translate-y-1/2 w-4 h-4 text-gray-400" />
               <input
                 type="text"
-                placeholder="Search invoice # or supplier..."
+                placeholder="Search invoice #, supplier, terminal or carrier..."
                 value={searchQuery}
                 onChange={(e) => setSearchQuery(e.target.value)}
                 className="input pl-10"
@@ -384,6 +407,13 @@ export default function InvoicesPage() {
                 </tbody>
               </table>
             </div>
+            {nextCursor && (
+              <div className="border-t border-gray-200 p-4 text-center">
+                <button onClick={loadMore} disabled={isLoadingMore} className="btn-secondary">
+                  {isLoadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
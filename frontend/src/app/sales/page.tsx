@@ -42,6 +42,9 @@ export default function SalesPage() {
   const [stations, setStations] = useState<Station[]>([]);
   const [fuelTypes, setFuelTypes] = useState<FuelType[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [totals, setTotals] = useState({ sales: 0, profit: 0 });
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [showModal, setShowModal] = useState(false);
   const [editingSale, setEditingSale] = useState<Sale | null>(null);
   const [filterStation, setFilterStation] = useState<number | null>(null);
@@ -77,11 +80,18 @@ export default function SalesPage() {
           station_id: filterStation || undefined,
           start_date: startDate || undefined,
           end_date: endDate || undefined,
+          include_total: true,
         }),
         stationsApi.getAll(),
         fuelTypesApi.getAll(),
       ]);
-      setSales(salesRes.data);
+      setSales(salesRes.data.items);
+      setNextCursor(salesRes.data.next_cursor);
+      // Totals cover every matching sale, not only the pages loaded
+      setTotals({
+        sales: parseFloat(salesRes.data.total_sales || '0'),
+        profit: parseFloat(salesRes.data.total_profit || '0'),
+      });
       setStations(stationsRes.data);
       setFuelTypes(fuelTypesRes.data);
     } catch (error) {
@@ -91,6 +101,25 @@ export default function SalesPage() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const salesRes = await salesApi.getAll({
+        station_id: filterStation || undefined,
+        start_date: startDate || undefined,
+        end_date: endDate || undefined,
+        cursor: nextCursor,
+      });
+      setSales((prev) => [...prev, ...salesRes.data.items]);
+      setNextCursor(salesRes.data.next_cursor);
+    } catch (error) {
+      console.error('Failed to load more sales:', error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const openModal = (sale?: Sale) => {
     if (sale) {
       setEditingSale(sale);
@@ -168,10 +197,6 @@ export default function SalesPage() {
     });
   };
 
-  // Calculate totals
-  const totalSales = sales.reduce((sum, s) => sum + parseFloat(s.total_sales || '0'), 0);
-  const totalProfit = sales.reduce((sum, s) => sum + parseFloat(s.total_profit || '0'), 0);
-
   if (authLoading || !user) {
     return (
       <div className="min-h-screen flex items-center justify-center">
@@ -241,11 +266,11 @@ export default function SalesPage() {
           <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
             <div className="card bg-green-50 border border-green-200">
               <p className="text-sm text-green-700">Total Sales</p>
-              <p className="text-2xl font-bold text-green-700">{formatCurrency(totalSales)}</p>
+              <p className="text-2xl font-bold text-green-700">{formatCurrency(totals.sales)}</p>
             </div>
             <div className="card bg-blue-50 border border-blue-200">
               <p className="text-sm text-blue-700">Total Profit</p>
-              <p className="text-2xl font-bold text-blue-700">{formatCurrency(totalProfit)}</p>
+              <p className="text-2xl font-bold text-blue-700">{formatCurrency(totals.profit)}</p>
             </div>
           </div>
         )}
@@ -339,6 +364,13 @@ export default function SalesPage() {
                 </tbody>
               </table>
             </div>
+            {nextCursor && (
+              <div className="border-t border-gray-200 p-4 text-center">
+                <button onClick={loadMore} disabled={isLoadingMore} className="btn-secondary">
+                  {isLoadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -61,7 +61,7 @@ export const fuelTypesApi = {
 
 // Invoices
 export const invoicesApi = {
-  getAll: (params?: { station_id?: number; fuel_type_id?: number; start_date?: string; end_date?: string; search?: string }) =>
+  getAll: (params?: { station_id?: number; fuel_type_id?: number; start_date?: string; end_date?: string; search?: string; limit?: number; cursor?: string }) =>
     api.get('/invoices', { params }),
   get: (id: number) => api.get(`/invoices/${id}`),
   create: (data: any) => api.post('/invoices', data),
@@ -85,7 +85,7 @@ export const invoicesApi = {
 
 // Sales
 export const salesApi = {
-  getAll: (params?: { station_id?: number; fuel_type_id?: number; start_date?: string; end_date?: string }) =>
+  getAll: (params?: { station_id?: number; fuel_type_id?: number; start_date?: string; end_date?: string; limit?: number; cursor?: string; include_total?: boolean }) =>
     api.get('/sales', { params }),
   get: (id: number) => api.get(`/sales/${id}`),
   create: (data: any) => api.post('/sales', data),
@@ -101,7 +101,14 @@ export const salesApi = {
 
 // Dashboard
 export const dashboardApi = {
-  get: (params?: { station_id?: number; days?: number; start_date?: string; end_date?: string }) =>
+  get: (params?: {
+    station_id?: number;
+    days?: number;
+    start_date?: string;
+    end_date?: string;
+    granularity?: 'day' | 'week' | 'month' | 'auto';
+    compare?: 'previous' | 'yoy';
+  }) =>
     api.get('/dashboard', { params }),
 };
 